@@ -17,14 +17,21 @@ from ..utils.exceptions import RateLimitError
 class BaseClient:
     """Base HTTP client with retry logic and logging."""
 
-    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = False
+    ):
         """
         Initialize base client.
 
         Args:
             base_url: Base URL for API requests
             headers: Optional default headers
+            http2: Negotiate HTTP/2 (requires the ``h2`` package)
         """
+        self.http2 = http2
         self.base_url = base_url.rstrip("/")
         self.config = get_config()
         self.logger = get_api_logger()
@@ -37,11 +44,18 @@ class BaseClient:
         if headers:
             default_headers.update(headers)
 
+        # One pooled client per instance: connections (and TLS sessions)
+        # are kept alive and reused across every request.
         self.client = httpx.Client(
             base_url=self.base_url,
             headers=default_headers,
             timeout=self.config.api.timeout,
-            follow_redirects=True
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.config.api.max_connections,
+                max_keepalive_connections=self.config.api.max_keepalive_connections
+            )
         )
 
     def _make_request_with_retry(self, method: str, url: str, **kwargs) -> httpx.Response:
@@ -66,9 +80,9 @@ class BaseClient:
             reraise=True
         )
         def _request():
-            self.logger.debug(f"{method} {url}")
+            self.logger.debug("%s %s", method, url)
             response = self.client.request(method, url, **kwargs)
-            self.logger.debug(f"Response: {response.status_code}")
+            self.logger.debug("Response: %s", response.status_code)
             return response
 
         return _request()
@@ -1,8 +1,9 @@
 """FileMaker Data API client with token caching and auto-refresh."""
 
+import asyncio
 import time
 import threading
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 import httpx
 
 from .base_client import BaseClient
@@ -24,7 +25,9 @@ class _TokenCache:
 
     FileMaker Data API sessions expire after 15 minutes of inactivity.
     We cache for 14 minutes (840 s) so we proactively refresh before
-    expiry, avoiding mid-request failures.
+    expiry, avoiding mid-request failures.  Every successful request
+    resets the server's idle timer, so it calls :meth:`touch` to slide
+    the cached expiry along with it.
     """
 
     def __init__(self, ttl_seconds: int = 840):
@@ -44,6 +47,12 @@ class _TokenCache:
             self._token = token
             self._expires_at = time.time() + self._ttl
 
+    def touch(self):
+        """Extend a live token's expiry after a request that used it."""
+        with self._lock:
+            if self._token:
+                self._expires_at = time.time() + self._ttl
+
     def invalidate(self):
         with self._lock:
             self._token = None
@@ -88,7 +97,7 @@ class FileMakerClient(BaseClient):
         if not host.startswith("https://") and not host.startswith("http://"):
             host = f"https://{host}"
 
-        super().__init__(base_url=host)
+        super().__init__(base_url=host, http2=True)
         self.logger = get_api_logger()
         self.token: Optional[str] = None
         self.session_timeout = config.filemaker.session_timeout
@@ -157,8 +166,13 @@ class FileMakerClient(BaseClient):
         return self.token
 
     def _ensure_authenticated(self):
-        """Ensure the client is authenticated before making requests."""
-        if not self.token:
+        """Ensure the client holds a live token before making requests.
+
+        Re-authenticates only when there is no token or the cached one has
+        expired (or was replaced by another client), so a stale session
+        never costs a 401 round trip.
+        """
+        if not self.token or _token_cache.get() != self.token:
             self.authenticate()
 
     # ------------------------------------------------------------------
@@ -187,6 +201,8 @@ class FileMakerClient(BaseClient):
             self.authenticate(force_refresh=True)
             response = self._make_request_with_retry(method, endpoint, **kwargs)
 
+        if response.status_code != 401:
+            _token_cache.touch()
         return response
 
     # ------------------------------------------------------------------
@@ -227,10 +243,13 @@ class FileMakerClient(BaseClient):
         if script_param is not None:
             params["script.param"] = script_param
 
-        self.logger.info(
-            f"Running FM script '{script_name}' on layout '{layout}'"
-            + (f" with param '{script_param}'" if script_param else "")
-        )
+        if script_param:
+            self.logger.info(
+                "Running FM script '%s' on layout '%s' with param '%s'",
+                script_name, layout, script_param
+            )
+        else:
+            self.logger.info("Running FM script '%s' on layout '%s'", script_name, layout)
 
         try:
             response = self._fm_request("GET", endpoint, params=params)
@@ -255,13 +274,33 @@ class FileMakerClient(BaseClient):
                 details={"code": code},
             )
 
-        self.logger.info(f"FM script '{script_name}' completed successfully")
+        self.logger.info("FM script '%s' completed successfully", script_name)
         return data.get("response", {})
 
     # ------------------------------------------------------------------
     # New architecture methods
     # ------------------------------------------------------------------
 
+    def iter_all_products(self, page_size: int = 100) -> Iterator[Dict[str, str]]:
+        """
+        Stream all product SKUs with Clasificación == "8" from FileMaker.
+
+        Products are yielded as each page arrives, so callers can keep only
+        the fields they need instead of the whole record list.
+
+        Yields:
+            One {"sku": "...", "name": "..."} dict per product
+
+        Raises:
+            FileMakerAPIError: If a request fails
+        """
+        for record in self._iter_stock_records(page_size):
+            fields = record["fieldData"]
+            yield {
+                "sku": str(fields["Conceptos Cobro_pk"]),
+                "name": fields.get("Nombre", ""),
+            }
+
     def get_all_products(self) -> List[Dict[str, str]]:
         """
         Fetch all product SKUs with Clasificación == "8" from FileMaker.
@@ -270,65 +309,83 @@ class FileMakerClient(BaseClient):
             List of {"sku": "...", "name": "..."} dicts.
         """
         self.logger.info("Fetching all product SKUs from FileMaker (paginated)...")
+        products = list(self.iter_all_products())
+        self.logger.info("Fetched %d product SKUs from FileMaker", len(products))
+        return products
 
-        endpoint = f"/fmi/data/v1/databases/{self.database}/layouts/{STOCK_LAYOUT}/_find"
-        page_size = 100
-        offset = 1
-        products: List[Dict[str, str]] = []
-
-        while True:
-            payload = {
-                "query": [{"Clasificación": "8"}],
-                "limit": str(page_size),
-                "offset": str(offset),
-            }
-
-            try:
-                response = self._fm_request("POST", endpoint, json=payload)
-            except httpx.HTTPError as e:
-                raise FileMakerAPIError(
-                    f"Network error fetching products (offset={offset}): {str(e)}",
-                    details={"error": str(e)}
-                )
+    def _recalc_endpoint(self) -> str:
+        """Script endpoint for the ActualizarStock_dapi recalculation."""
+        import urllib.parse
 
-            if response.status_code != 200:
-                raise FileMakerAPIError(
-                    f"Unexpected HTTP {response.status_code} fetching products",
-                    details={"response": response.text}
-                )
+        script_name = "ActualizarStock_dapi"
+        encoded = urllib.parse.quote(script_name, safe="")
+        return (
+            f"/fmi/data/v1/databases/{self.database}"
+            f"/layouts/{MOVEMENTS_LAYOUT}/script/{encoded}"
+        )
 
-            data = response.json()
-            code = _fm_code(data)
+    @staticmethod
+    def _check_recalc_response(sku: str, response: httpx.Response) -> None:
+        """Raise FileMakerAPIError unless the recalc script reported success."""
+        if response.status_code != 200:
+            raise FileMakerAPIError(
+                f"HTTP {response.status_code} running recalc for SKU {sku}",
+                details={"sku": sku, "response": response.text},
+            )
 
-            if code == "401":  # No records match
-                break
-            if code != "0":
-                raise FileMakerAPIError(
-                    f"FileMaker error: {_fm_message(data)}", details={"code": code}
-                )
+        data = response.json()
+        script_error = data.get("response", {}).get("scriptError", "")
+        if script_error != "0":
+            raise FileMakerAPIError(
+                f"Recalc script error for SKU {sku}: scriptError={script_error}",
+                details={"sku": sku, "script_error": script_error},
+            )
 
-            records = data["response"]["data"]
-            if not records:
-                break
+    @staticmethod
+    def _parse_stock_response(sku: str, response: httpx.Response) -> int:
+        """Extract the clamped Inventario value from a stock ``_find`` response."""
+        if response.status_code != 200:
+            raise FileMakerAPIError(
+                f"HTTP {response.status_code} fetching stock for SKU {sku}",
+                details={"sku": sku, "response": response.text},
+            )
 
-            for record in records:
-                fields = record["fieldData"]
-                products.append({
-                    "sku": str(fields["Conceptos Cobro_pk"]),
-                    "name": fields.get("Nombre", ""),
-                })
+        data = response.json()
+        code = _fm_code(data)
 
-            self.logger.info(
-                f"Fetched page {(offset - 1) // page_size + 1}: "
-                f"{len(records)} records (total so far: {len(products)})"
+        if code == "401":
+            raise FileMakerAPIError(
+                f"Product not found in FM for SKU {sku}",
+                details={"sku": sku},
+            )
+        if code != "0":
+            raise FileMakerAPIError(
+                f"FM error fetching stock for SKU {sku}: {_fm_message(data)}",
+                details={"code": code},
             )
 
-            if len(records) < page_size:
-                break
-            offset += page_size
+        try:
+            fields = data["response"]["data"][0]["fieldData"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise FileMakerAPIError(
+                f"Malformed stock record for SKU {sku}: {e!r}",
+                details={"sku": sku},
+            )
+        return FileMakerClient._clamped_inventario(sku, fields)
 
-        self.logger.info(f"Fetched {len(products)} product SKUs from FileMaker")
-        return products
+    @staticmethod
+    def _clamped_inventario(sku: str, fields: Dict[str, Any]) -> int:
+        """Parse a record's Inventario field as a non-negative int."""
+        # Inventario may come back as int, float, str, or None
+        raw_inv = fields.get("Inventario")
+        try:
+            quantity = int(float(raw_inv)) if raw_inv not in (None, "", 0.0) else 0
+        except (TypeError, ValueError) as e:
+            raise FileMakerAPIError(
+                f"Malformed stock record for SKU {sku}: {e!r}",
+                details={"sku": sku},
+            )
+        return max(0, quantity)
 
     def recalculate_stock(self, sku: str) -> None:
         """
@@ -339,18 +396,9 @@ class FileMakerClient(BaseClient):
         Raises:
             FileMakerAPIError: If the script fails or returns a non-zero scriptError.
         """
-        import urllib.parse
-
-        script_name = "ActualizarStock_dapi"
-        encoded = urllib.parse.quote(script_name, safe="")
-        endpoint = (
-            f"/fmi/data/v1/databases/{self.database}"
-            f"/layouts/{MOVEMENTS_LAYOUT}/script/{encoded}"
-        )
-
         try:
             response = self._fm_request(
-                "GET", endpoint, params={"script.param": sku}
+                "GET", self._recalc_endpoint(), params={"script.param": sku}
             )
         except httpx.HTTPError as e:
             raise FileMakerAPIError(
@@ -358,19 +406,7 @@ class FileMakerClient(BaseClient):
                 details={"sku": sku, "error": str(e)},
             )
 
-        if response.status_code != 200:
-            raise FileMakerAPIError(
-                f"HTTP {response.status_code} running recalc for SKU {sku}",
-                details={"sku": sku, "response": response.text},
-            )
-
-        data = response.json()
-        script_error = data.get("response", {}).get("scriptError", "")
-        if script_error != "0":
-            raise FileMakerAPIError(
-                f"Recalc script error for SKU {sku}: scriptError={script_error}",
-                details={"sku": sku, "script_error": script_error},
-            )
+        self._check_recalc_response(sku, response)
 
     def get_stock(self, sku: str) -> int:
         """
@@ -396,30 +432,179 @@ class FileMakerClient(BaseClient):
                 details={"sku": sku, "error": str(e)},
             )
 
-        if response.status_code != 200:
+        return self._parse_stock_response(sku, response)
+
+    # ------------------------------------------------------------------
+    # Async variants (concurrent nightly recalculation / stock fetch)
+    # ------------------------------------------------------------------
+
+    def async_client(self, max_connections: int = 8) -> httpx.AsyncClient:
+        """Create an authenticated ``httpx.AsyncClient`` for this database.
+
+        The caller owns the client and must close it (``async with``) inside
+        the event loop that uses it.  Call :meth:`authenticate` first so the
+        client starts with a valid session token.
+        """
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=dict(self.client.headers),
+            timeout=self.config.api.timeout,
+            follow_redirects=True,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def _afm_request(
+        self,
+        client: httpx.AsyncClient,
+        auth_lock: asyncio.Lock,
+        method: str,
+        endpoint: str,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Async counterpart of :meth:`_fm_request`.
+
+        On HTTP 401 the session is refreshed once for all concurrent callers:
+        whoever takes ``auth_lock`` first re-authenticates, the rest see the
+        new token on ``client`` and simply retry.
+        """
+        token = client.headers.get("Authorization")
+        response = await client.request(method, endpoint, **kwargs)
+
+        if response.status_code == 401:
+            async with auth_lock:
+                if client.headers.get("Authorization") == token:
+                    self.logger.warning(
+                        "FileMaker session expired (HTTP 401), re-authenticating..."
+                    )
+                    _token_cache.invalidate()
+                    self.token = None
+                    new_token = await asyncio.to_thread(self.authenticate, True)
+                    client.headers["Authorization"] = f"Bearer {new_token}"
+            response = await client.request(method, endpoint, **kwargs)
+
+        if response.status_code != 401:
+            _token_cache.touch()
+        return response
+
+    async def arecalculate_stock(
+        self, sku: str, client: httpx.AsyncClient, auth_lock: asyncio.Lock
+    ) -> None:
+        """
+        Async variant of :meth:`recalculate_stock`.
+
+        Args:
+            sku: Product SKU.
+            client: Client from :meth:`async_client`.
+            auth_lock: Lock shared by every task using ``client``.
+        """
+        try:
+            response = await self._afm_request(
+                client, auth_lock, "GET", self._recalc_endpoint(),
+                params={"script.param": sku}
+            )
+        except httpx.HTTPError as e:
             raise FileMakerAPIError(
-                f"HTTP {response.status_code} fetching stock for SKU {sku}",
-                details={"sku": sku, "response": response.text},
+                f"Network error running recalc for SKU {sku}: {str(e)}",
+                details={"sku": sku, "error": str(e)},
             )
 
-        data = response.json()
-        code = _fm_code(data)
+        self._check_recalc_response(sku, response)
 
-        if code == "401":
+    async def aget_stock(
+        self, sku: str, client: httpx.AsyncClient, auth_lock: asyncio.Lock
+    ) -> int:
+        """
+        Async variant of :meth:`get_stock`.
+
+        Args:
+            sku: Product SKU.
+            client: Client from :meth:`async_client`.
+            auth_lock: Lock shared by every task using ``client``.
+        """
+        endpoint = f"/fmi/data/v1/databases/{self.database}/layouts/{STOCK_LAYOUT}/_find"
+        payload = {"query": [{"Conceptos Cobro_pk": sku}]}
+
+        try:
+            response = await self._afm_request(client, auth_lock, "POST", endpoint, json=payload)
+        except httpx.HTTPError as e:
             raise FileMakerAPIError(
-                f"Product not found in FM for SKU {sku}",
-                details={"sku": sku},
+                f"Network error fetching stock for SKU {sku}: {str(e)}",
+                details={"sku": sku, "error": str(e)},
+            )
+
+        return self._parse_stock_response(sku, response)
+
+    async def aget_stocks(
+        self, skus: List[str], client: httpx.AsyncClient, auth_lock: asyncio.Lock
+    ) -> Dict[str, int]:
+        """
+        Fetch stock for several SKUs with a single ``_find`` request.
+
+        Each SKU is its own find request in the query array, which
+        FileMaker combines with OR.
+
+        Args:
+            skus: Distinct product SKUs.
+            client: Client from :meth:`async_client`.
+            auth_lock: Lock shared by every task using ``client``.
+
+        Returns:
+            SKU → clamped Inventario for every SKU found; SKUs missing from
+            FileMaker are absent.
+
+        Raises:
+            FileMakerAPIError: If the request fails or FM reports an error.
+        """
+        if not skus:
+            return {}
+
+        endpoint = f"/fmi/data/v1/databases/{self.database}/layouts/{STOCK_LAYOUT}/_find"
+        payload = {
+            "query": [{"Conceptos Cobro_pk": f"=={sku}"} for sku in skus],
+            "limit": str(len(skus)),
+        }
+
+        try:
+            response = await self._afm_request(client, auth_lock, "POST", endpoint, json=payload)
+        except httpx.HTTPError as e:
+            raise FileMakerAPIError(
+                f"Network error fetching stock for {len(skus)} SKUs: {str(e)}",
+                details={"skus": skus, "error": str(e)},
             )
+
+        if response.status_code != 200:
+            raise FileMakerAPIError(
+                f"HTTP {response.status_code} fetching stock for {len(skus)} SKUs",
+                details={"skus": skus, "response": response.text},
+            )
+
+        data = response.json()
+        code = _fm_code(data)
+        if code == "401":  # No records match
+            return {}
         if code != "0":
             raise FileMakerAPIError(
-                f"FM error fetching stock for SKU {sku}: {_fm_message(data)}",
+                f"FM error fetching stock for {len(skus)} SKUs: {_fm_message(data)}",
                 details={"code": code},
             )
 
-        fields = data["response"]["data"][0]["fieldData"]
-        raw_inv = fields.get("Inventario")
-        quantity = int(float(raw_inv)) if raw_inv not in (None, "", 0.0) else 0
-        return max(0, quantity)
+        stock: Dict[str, int] = {}
+        try:
+            for record in data["response"]["data"]:
+                fields = record["fieldData"]
+                sku = str(fields["Conceptos Cobro_pk"])
+                stock[sku] = self._clamped_inventario(sku, fields)
+        except (KeyError, TypeError) as e:
+            raise FileMakerAPIError(
+                f"Malformed stock records for {len(skus)} SKUs: {e!r}",
+                details={"skus": skus},
+            )
+        return stock
 
     def create_movement(self, sku: str, quantity_out: int) -> None:
         """
@@ -437,10 +622,7 @@ class FileMakerClient(BaseClient):
         Raises:
             FileMakerAPIError: If record creation fails.
         """
-        endpoint = (
-            f"/fmi/data/v1/databases/{self.database}"
-            f"/layouts/{MOVEMENTS_LAYOUT}/records"
-        )
+        endpoint = self._movements_endpoint()
         payload = {
             "fieldData": {
                 "Concepto Cobro_fk": int(sku),
@@ -457,9 +639,24 @@ class FileMakerClient(BaseClient):
                 details={"sku": sku, "error": str(e)},
             )
 
+        self._check_movement_response(sku, response)
+        self.logger.info("Movement record created for SKU %s (salida: %s)", sku, quantity_out)
+
+    def _movements_endpoint(self) -> str:
+        """Records endpoint of the stock movements layout."""
+        return (
+            f"/fmi/data/v1/databases/{self.database}"
+            f"/layouts/{MOVEMENTS_LAYOUT}/records"
+        )
+
+    @staticmethod
+    def _check_movement_response(
+        sku: str, response: httpx.Response, kind: str = "movement"
+    ) -> None:
+        """Raise FileMakerAPIError unless the movement record was created."""
         if response.status_code != 200:
             raise FileMakerAPIError(
-                f"HTTP {response.status_code} creating movement for SKU {sku}",
+                f"HTTP {response.status_code} creating {kind} for SKU {sku}",
                 details={"sku": sku, "response": response.text},
             )
 
@@ -467,11 +664,46 @@ class FileMakerClient(BaseClient):
         code = _fm_code(data)
         if code != "0":
             raise FileMakerAPIError(
-                f"FM error creating movement for SKU {sku}: {_fm_message(data)}",
+                f"FM error creating {kind} for SKU {sku}: {_fm_message(data)}",
                 details={"code": code},
             )
 
-        self.logger.info(f"Movement record created for SKU {sku} (salida: {quantity_out})")
+    async def acreate_movement(
+        self,
+        sku: str,
+        quantity_out: int,
+        client: httpx.AsyncClient,
+        auth_lock: asyncio.Lock
+    ) -> None:
+        """
+        Async variant of :meth:`create_movement`.
+
+        Args:
+            sku: Conceptos Cobro_pk.
+            quantity_out: Number of units sold (positive integer).
+            client: Client from :meth:`async_client`.
+            auth_lock: Lock shared by every task using ``client``.
+        """
+        payload = {
+            "fieldData": {
+                "Concepto Cobro_fk": int(sku),
+                "Inv_Cant_Salida": quantity_out,
+                "Inv_Cant_Entrada": 0,
+            }
+        }
+
+        try:
+            response = await self._afm_request(
+                client, auth_lock, "POST", self._movements_endpoint(), json=payload
+            )
+        except httpx.HTTPError as e:
+            raise FileMakerAPIError(
+                f"Network error creating movement for SKU {sku}: {str(e)}",
+                details={"sku": sku, "error": str(e)},
+            )
+
+        self._check_movement_response(sku, response)
+        self.logger.info("Movement record created for SKU %s (salida: %s)", sku, quantity_out)
 
     def create_entry_movement(self, sku: str, quantity_in: int) -> None:
         """
@@ -491,10 +723,7 @@ class FileMakerClient(BaseClient):
         Raises:
             FileMakerAPIError: If record creation fails.
         """
-        endpoint = (
-            f"/fmi/data/v1/databases/{self.database}"
-            f"/layouts/{MOVEMENTS_LAYOUT}/records"
-        )
+        endpoint = self._movements_endpoint()
         payload = {
             "fieldData": {
                 "Concepto Cobro_fk": int(sku),
@@ -511,45 +740,25 @@ class FileMakerClient(BaseClient):
                 details={"sku": sku, "error": str(e)},
             )
 
-        if response.status_code != 200:
-            raise FileMakerAPIError(
-                f"HTTP {response.status_code} creating entry movement for SKU {sku}",
-                details={"sku": sku, "response": response.text},
-            )
-
-        data = response.json()
-        code = _fm_code(data)
-        if code != "0":
-            raise FileMakerAPIError(
-                f"FM error creating entry movement for SKU {sku}: {_fm_message(data)}",
-                details={"code": code},
-            )
-
-        self.logger.info(f"Entry movement record created for SKU {sku} (entrada: {quantity_in})")
+        self._check_movement_response(sku, response, kind="entry movement")
+        self.logger.info("Entry movement record created for SKU %s (entrada: %s)", sku, quantity_in)
 
     # ------------------------------------------------------------------
     # Legacy stock retrieval (still used internally)
     # ------------------------------------------------------------------
 
-    def get_all_stock(self) -> List[StockItem]:
+    def _iter_stock_records(self, page_size: int = 100) -> Iterator[Dict[str, Any]]:
         """
-        Fetch all sellable products (Clasificación == "8") from FileMaker.
-
-        FileMaker Data API returns a maximum of 100 records per request,
-        so this method paginates automatically until all records are fetched.
+        Yield raw sellable-product records (Clasificación == "8") page by page.
 
-        Returns:
-            List of StockItem objects, one per product
+        FileMaker Data API returns a maximum of 100 records per request by
+        default, so this paginates with 1-based offsets until a short page.
 
         Raises:
-            FileMakerAPIError: If the request fails
+            FileMakerAPIError: If a request fails
         """
-        self.logger.info("Fetching all stock from FileMaker (paginated)...")
-
         endpoint = f"/fmi/data/v1/databases/{self.database}/layouts/{STOCK_LAYOUT}/_find"
-        page_size = 100
         offset = 1  # FM uses 1-based offsets
-        stock_items: List[StockItem] = []
 
         while True:
             payload = {
@@ -577,9 +786,7 @@ class FileMakerClient(BaseClient):
 
             if code == "401":
                 # FM "No records match the request"
-                if not stock_items:
-                    self.logger.warning("No stock records found with Clasificación=8")
-                break  # No more records
+                return
 
             if code != "0":
                 raise FileMakerAPIError(
@@ -589,44 +796,74 @@ class FileMakerClient(BaseClient):
 
             records = data["response"]["data"]
             if not records:
-                break
-
-            for record in records:
-                fields = record["fieldData"]
-
-                # Conceptos Cobro_pk is the product identifier used as SKU
-                sku = str(fields["Conceptos Cobro_pk"])
-
-                # Inventario may come back as int, float, str, or None
-                raw_inv = fields.get("Inventario")
-                quantity = int(float(raw_inv)) if raw_inv not in (None, "", 0.0) else 0
-                # Ensure non-negative (FM can store negative stock in edge cases)
-                quantity = max(0, quantity)
-
-                stock_items.append(StockItem(
-                    sku=sku,
-                    quantity=quantity,
-                    source="filemaker",
-                    metadata={
-                        "record_id": record["recordId"],
-                        "nombre": fields.get("Nombre", ""),
-                        "valor": fields.get("Valor"),
-                        "clasificacion": fields.get("Clasificación", "")
-                    }
-                ))
+                return
 
             self.logger.info(
-                f"Fetched page {(offset - 1) // page_size + 1}: "
-                f"{len(records)} records (total so far: {len(stock_items)})"
+                "Fetched page %d: %d records (total so far: %d)",
+                (offset - 1) // page_size + 1, len(records), offset - 1 + len(records)
             )
 
+            yield from records
+
             # If we got fewer records than page_size, we're done
             if len(records) < page_size:
-                break
+                return
 
             offset += page_size
 
-        self.logger.info(f"Fetched {len(stock_items)} total stock items from FileMaker")
+    def iter_all_stock(self, page_size: int = 100) -> Iterator[StockItem]:
+        """
+        Stream all sellable products (Clasificación == "8") from FileMaker.
+
+        Items are yielded as each page arrives, so callers can start
+        processing before the last page is fetched and never hold the
+        whole catalogue in memory.
+
+        Yields:
+            One StockItem per product
+
+        Raises:
+            FileMakerAPIError: If a request fails
+        """
+        count = 0
+        for record in self._iter_stock_records(page_size):
+            fields = record["fieldData"]
+
+            # Inventario may come back as int, float, str, or None
+            raw_inv = fields.get("Inventario")
+            quantity = int(float(raw_inv)) if raw_inv not in (None, "", 0.0) else 0
+
+            count += 1
+            yield StockItem(
+                # Conceptos Cobro_pk is the product identifier used as SKU
+                sku=str(fields["Conceptos Cobro_pk"]),
+                # Ensure non-negative (FM can store negative stock in edge cases)
+                quantity=max(0, quantity),
+                source="filemaker",
+                metadata={
+                    "record_id": record["recordId"],
+                    "nombre": fields.get("Nombre", ""),
+                    "valor": fields.get("Valor"),
+                    "clasificacion": fields.get("Clasificación", "")
+                }
+            )
+
+        if not count:
+            self.logger.warning("No stock records found with Clasificación=8")
+
+    def get_all_stock(self) -> List[StockItem]:
+        """
+        Fetch all sellable products (Clasificación == "8") from FileMaker.
+
+        Returns:
+            List of StockItem objects, one per product
+
+        Raises:
+            FileMakerAPIError: If the request fails
+        """
+        self.logger.info("Fetching all stock from FileMaker (paginated)...")
+        stock_items = list(self.iter_all_stock())
+        self.logger.info("Fetched %d total stock items from FileMaker", len(stock_items))
         return stock_items
 
     def get_stock_by_sku(self, sku: str) -> Optional[StockItem]:
@@ -643,7 +880,7 @@ class FileMakerClient(BaseClient):
             FileMakerAPIError: If the request fails for any reason other than
                                "no records found"
         """
-        self.logger.debug(f"Fetching stock for SKU (Conceptos Cobro_pk): {sku}")
+        self.logger.debug("Fetching stock for SKU (Conceptos Cobro_pk): %s", sku)
 
         endpoint = f"/fmi/data/v1/databases/{self.database}/layouts/{STOCK_LAYOUT}/_find"
         # FileMaker exact-match operator: ==value
@@ -668,7 +905,7 @@ class FileMakerClient(BaseClient):
 
         # FM code "401" = "No records match the request" — not an HTTP 401
         if code == "401":
-            self.logger.warning(f"SKU not found in FileMaker: {sku}")
+            self.logger.warning("SKU not found in FileMaker: %s", sku)
             return None
 
         if code != "0":
@@ -756,7 +993,8 @@ class FileMakerClient(BaseClient):
             FileMakerAPIError: If either step fails.
         """
         self.logger.info(
-            f"Recording stock movement — SKU: {sku}, change: {quantity_change} ({movement_type})"
+            "Recording stock movement — SKU: %s, change: %s (%s)",
+            sku, quantity_change, movement_type
         )
 
         concepto_cobro_pk = int(sku)
@@ -804,7 +1042,7 @@ class FileMakerClient(BaseClient):
                 details={"sku": sku, "code": code}
             )
 
-        self.logger.debug(f"Movement record created for SKU {sku}")
+        self.logger.debug("Movement record created for SKU %s", sku)
 
         # ── Step 2: Trigger the stock-recalculation script ────────────
         script_endpoint = (
@@ -839,8 +1077,8 @@ class FileMakerClient(BaseClient):
             )
 
         self.logger.info(
-            f"Stock movement recorded and recalculated — "
-            f"SKU: {sku}, salida: {cant_salida}, entrada: {cant_entrada}"
+            "Stock movement recorded and recalculated — SKU: %s, salida: %s, entrada: %s",
+            sku, cant_salida, cant_entrada
         )
         return True
 
@@ -867,7 +1105,7 @@ class FileMakerClient(BaseClient):
             self.delete(endpoint)
             self.logger.info("FileMaker logout successful")
         except Exception as e:
-            self.logger.warning(f"FileMaker logout failed (session may have expired): {str(e)}")
+            self.logger.warning("FileMaker logout failed (session may have expired): %s", e)
         finally:
             self.token = None
             self.client.headers.pop("Authorization", None)
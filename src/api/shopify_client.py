@@ -1,5 +1,7 @@
 """Shopify Admin REST API client."""
 
+import asyncio
+import threading
 import time
 from typing import List, Dict, Any, Optional
 import httpx
@@ -8,9 +10,54 @@ from .base_client import BaseClient
 from ..utils.config import get_config
 from ..utils.logger import get_api_logger
 from ..utils.exceptions import ShopifyAPIError, SKUNotFoundError, RateLimitError
-from ..models.product import StockItem
+from ..models.product import StockItem, StockUpdate
 
 GID_LOCATION_PREFIX = "gid://shopify/Location/"
+GID_INVENTORY_ITEM_PREFIX = "gid://shopify/InventoryItem/"
+
+# REST leaky bucket restore rate (calls per second) on standard plans.
+REST_BUCKET_LEAK_RATE = 2.0
+
+# inventorySetQuantities accepts at most 250 quantities per call.
+INVENTORY_SET_MAX_QUANTITIES = 250
+
+# SKUs per productVariants search string (results are paginated at 250).
+VARIANT_QUERY_SKU_CHUNK = 100
+
+VARIANTS_BY_SKU_QUERY = """
+query variantsBySku($query: String!, $cursor: String, $locationId: ID!) {
+  productVariants(first: 250, after: $cursor, query: $query) {
+    nodes {
+      id
+      sku
+      product { id title }
+      inventoryItem {
+        id
+        inventoryLevel(locationId: $locationId) {
+          quantities(names: ["available"]) { name quantity }
+        }
+      }
+    }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+INVENTORY_SET_QUANTITIES_MUTATION = """
+mutation inventorySetQuantities($input: InventorySetQuantitiesInput!) {
+  inventorySetQuantities(input: $input) {
+    inventoryAdjustmentGroup { id }
+    userErrors { field message }
+  }
+}
+"""
+
+
+def _gid_to_int(gid: Optional[str]) -> Optional[int]:
+    """Extract the numeric ID from a Shopify GraphQL global ID."""
+    if not gid:
+        return None
+    return int(gid.rsplit("/", 1)[-1])
 
 
 class ShopifyClient(BaseClient):
@@ -30,7 +77,9 @@ class ShopifyClient(BaseClient):
             "Content-Type": "application/json"
         }
 
-        super().__init__(base_url=shop_url, headers=headers)
+        # Shopify's Admin API speaks HTTP/2: concurrent batch mutations and
+        # lookups share one TLS connection as multiplexed streams.
+        super().__init__(base_url=shop_url, headers=headers, http2=True)
         self.logger = get_api_logger()
         self.api_version = config.shopify.api_version
         self.rate_limit_delay = config.shopify.rate_limit_delay
@@ -44,25 +93,71 @@ class ShopifyClient(BaseClient):
 
         # Cached SKU → variant mapping (built lazily)
         self._sku_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        # SKU → last known StockItem, filled by bulk lookups and kept in
+        # step with our own writes; cleared by invalidate_cache().
+        self._inventory_cache: Dict[str, StockItem] = {}
+        # One client is shared by the webhook batcher and refund threads:
+        # the lock makes concurrent cold misses wait for a single catalog
+        # crawl and keeps invalidation from racing a build.
+        self._cache_lock = threading.Lock()
+
+        # GraphQL leaky-bucket state, refreshed from every GraphQL response
+        self._available_cost: Optional[float] = None
+        self._restore_rate: float = 50.0
 
     # ------------------------------------------------------------------
     # Rate-limit handling
     # ------------------------------------------------------------------
 
     def _handle_rate_limit(self, response: httpx.Response):
-        """Inspect Shopify headers and back off when approaching limits."""
+        """Inspect Shopify headers and back off when approaching limits.
+
+        The REST bucket leaks at ``REST_BUCKET_LEAK_RATE`` calls/s; we only
+        sleep long enough to bring free capacity back above 10% of the
+        bucket, so calls are not delayed while there is headroom.
+        """
         rate_limit_header = response.headers.get("X-Shopify-Shop-Api-Call-Limit")
         if rate_limit_header:
             current, limit = map(int, rate_limit_header.split("/"))
-            if current >= limit * 0.9:
-                self.logger.warning(f"Approaching rate limit: {current}/{limit}. Waiting...")
-                time.sleep(self.rate_limit_delay * 2)
+            available = limit - current
+            threshold = limit * 0.1
+            if available < threshold:
+                wait = max(self.rate_limit_delay, (threshold - available) / REST_BUCKET_LEAK_RATE)
+                self.logger.warning(
+                    "Approaching rate limit: %s/%s. Waiting %.2fs...", current, limit, wait
+                )
+                time.sleep(wait)
 
         if response.status_code == 429:
             retry_after = int(response.headers.get("Retry-After", 2))
-            self.logger.warning(f"Rate limited. Waiting {retry_after}s...")
+            self.logger.warning("Rate limited. Waiting %ss...", retry_after)
             time.sleep(retry_after)
-            raise RateLimitError(f"Rate limited. Retry after {retry_after}s.")
+            raise RateLimitError(
+                f"Rate limited. Retry after {retry_after}s.",
+                details={"retry_after": retry_after}
+            )
+
+    def _handle_graphql_throttle(self, data: Dict[str, Any]):
+        """Pace GraphQL calls using the cost info Shopify returns.
+
+        Only sleeps when the bucket no longer holds enough points for a
+        request of the same cost, so normal load incurs no delay.
+        """
+        cost = data.get("extensions", {}).get("cost")
+        if not cost:
+            return
+
+        throttle = cost.get("throttleStatus", {})
+        self._available_cost = throttle.get("currentlyAvailable", self._available_cost)
+        self._restore_rate = throttle.get("restoreRate", self._restore_rate) or self._restore_rate
+
+        requested = cost.get("requestedQueryCost", 0)
+        if self._available_cost is not None and self._available_cost < requested:
+            wait = (requested - self._available_cost) / self._restore_rate
+            self.logger.warning(
+                "GraphQL bucket low (%s available). Waiting %.2fs...", self._available_cost, wait
+            )
+            time.sleep(wait)
 
     # ------------------------------------------------------------------
     # Low-level REST helpers
@@ -80,7 +175,6 @@ class ShopifyClient(BaseClient):
                     details={"response": response.text}
                 )
 
-            time.sleep(self.rate_limit_delay)
             return response.json()
 
         except (ShopifyAPIError, RateLimitError):
@@ -100,7 +194,6 @@ class ShopifyClient(BaseClient):
                     details={"response": response.text}
                 )
 
-            time.sleep(self.rate_limit_delay)
             return response.json()
 
         except (ShopifyAPIError, RateLimitError):
@@ -108,6 +201,39 @@ class ShopifyClient(BaseClient):
         except httpx.HTTPError as e:
             raise ShopifyAPIError(f"HTTP error on POST {path}: {str(e)}")
 
+    def _graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST a query against the Shopify Admin GraphQL API.
+
+        Returns:
+            The ``data`` object of the response.
+        """
+        path = f"/admin/api/{self.api_version}/graphql.json"
+        try:
+            response = self.post(path, json={"query": query, "variables": variables or {}})
+            self._handle_rate_limit(response)
+
+            if response.status_code != 200:
+                raise ShopifyAPIError(
+                    f"GraphQL request failed (HTTP {response.status_code})",
+                    details={"response": response.text}
+                )
+
+            data = response.json()
+            self._handle_graphql_throttle(data)
+
+            if data.get("errors"):
+                raise ShopifyAPIError(
+                    f"GraphQL errors: {data['errors']}",
+                    details={"errors": data["errors"]}
+                )
+
+            return data.get("data", {})
+
+        except (ShopifyAPIError, RateLimitError):
+            raise
+        except httpx.HTTPError as e:
+            raise ShopifyAPIError(f"HTTP error on GraphQL request: {str(e)}")
+
     # ------------------------------------------------------------------
     # SKU cache — fetch ALL products once and build a lookup table
     # ------------------------------------------------------------------
@@ -153,8 +279,8 @@ class ShopifyClient(BaseClient):
                         }
 
             self.logger.info(
-                f"  Page {page}: {len(products)} products "
-                f"(cache size: {len(sku_map)} SKUs)"
+                "  Page %d: %d products (cache size: %d SKUs)",
+                page, len(products), len(sku_map)
             )
 
             if len(products) < 250:
@@ -165,7 +291,7 @@ class ShopifyClient(BaseClient):
             if not page_info:
                 break
 
-        self.logger.info(f"SKU cache built: {len(sku_map)} variants indexed")
+        self.logger.info("SKU cache built: %d variants indexed", len(sku_map))
         return sku_map
 
     def _extract_page_info(self, response_data: Any) -> Optional[str]:
@@ -181,14 +307,20 @@ class ShopifyClient(BaseClient):
         return None
 
     def invalidate_cache(self):
-        """Clear the SKU cache so it gets rebuilt on next access."""
-        self._sku_cache = None
+        """Clear the SKU and inventory caches so they get rebuilt on next access."""
+        with self._cache_lock:
+            self._sku_cache = None
+            self._inventory_cache = {}
 
     def _get_sku_map(self) -> Dict[str, Dict[str, Any]]:
         """Get or build the SKU cache."""
-        if self._sku_cache is None:
-            self._sku_cache = self._build_sku_cache()
-        return self._sku_cache
+        sku_map = self._sku_cache
+        if sku_map is None:
+            with self._cache_lock:
+                sku_map = self._sku_cache
+                if sku_map is None:
+                    sku_map = self._sku_cache = self._build_sku_cache()
+        return sku_map
 
     # ------------------------------------------------------------------
     # Inventory queries
@@ -196,15 +328,32 @@ class ShopifyClient(BaseClient):
 
     def get_inventory_by_sku(self, sku: str) -> Optional[StockItem]:
         """
-        Look up the current *available* inventory for a single SKU at
-        the configured location.
+        Look up the *available* inventory for a single SKU at the
+        configured location.
 
-        Uses the pre-built SKU cache (fetches all products once) and then
-        queries inventory_levels for the specific inventory_item_id.
+        Served from the inventory cache when the SKU was seen by a bulk
+        lookup since the last :meth:`invalidate_cache`; otherwise one
+        GraphQL search, falling back to the REST SKU cache.
 
         Returns:
-            A StockItem with current available quantity, or None if the
-            SKU does not exist in Shopify.
+            A StockItem with available quantity, or None if the SKU does
+            not exist in Shopify.
+        """
+        cached = self._inventory_cache.get(sku)
+        if cached is not None:
+            return cached
+
+        try:
+            return self.get_inventory_by_skus([sku]).get(sku)
+        except ShopifyAPIError as e:
+            self.logger.warning("GraphQL lookup failed for %s (%s); using REST", sku, e.message)
+
+        return self._rest_inventory_by_sku(sku)
+
+    def _rest_inventory_by_sku(self, sku: str) -> Optional[StockItem]:
+        """
+        REST lookup: the pre-built SKU cache (fetches all products once)
+        and then inventory_levels for the specific inventory_item_id.
         """
         sku_map = self._get_sku_map()
         variant_info = sku_map.get(sku)
@@ -225,7 +374,7 @@ class ShopifyClient(BaseClient):
                 }
             )
         except ShopifyAPIError as e:
-            self.logger.error(f"Error fetching inventory level for SKU {sku}: {e.message}")
+            self.logger.error("Error fetching inventory level for SKU %s: %s", sku, e.message)
             raise
 
         levels = inv_data.get("inventory_levels", [])
@@ -233,18 +382,176 @@ class ShopifyClient(BaseClient):
         if levels:
             quantity = levels[0].get("available", 0) or 0
 
-        return StockItem(
+        return StockItem._unchecked(
             sku=sku,
             quantity=quantity,
             source="shopify",
             metadata={
-                "variant_id": str(variant_info["variant_id"]),
-                "inventory_item_id": str(inventory_item_id),
-                "product_id": str(variant_info.get("product_id", "")),
+                "variant_id": variant_info["variant_id"],
+                "inventory_item_id": inventory_item_id,
+                "product_id": variant_info.get("product_id"),
                 "product_title": variant_info.get("product_title", ""),
             }
         )
 
+    def async_client(self) -> httpx.AsyncClient:
+        """Create an ``httpx.AsyncClient`` with this client's base URL and headers.
+
+        The caller owns the client and must close it (``async with``) inside
+        the event loop that uses it.
+        """
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=dict(self.client.headers),
+            timeout=self.config.api.timeout,
+            follow_redirects=True,
+            http2=self.http2
+        )
+
+    async def aget_inventory_by_sku(
+        self, sku: str, client: httpx.AsyncClient
+    ) -> Optional[StockItem]:
+        """
+        Async variant of :meth:`get_inventory_by_sku` for concurrent lookups.
+
+        Args:
+            sku: Variant SKU.
+            client: Client from :meth:`async_client`.
+
+        Returns:
+            A StockItem with current available quantity, or None if the
+            SKU does not exist in Shopify.
+        """
+        variant_info = self._get_sku_map().get(sku)
+        if not variant_info:
+            return None
+
+        inventory_item_id = variant_info["inventory_item_id"]
+        path = f"/admin/api/{self.api_version}/inventory_levels.json"
+        params = {
+            "inventory_item_ids": str(inventory_item_id),
+            "location_ids": self.location_id
+        }
+
+        for _ in range(self.config.api.max_retries):
+            try:
+                response = await client.get(path, params=params)
+            except httpx.HTTPError as e:
+                raise ShopifyAPIError(f"HTTP error on GET {path}: {str(e)}")
+
+            if response.status_code != 429:
+                break
+            retry_after = int(response.headers.get("Retry-After", 2))
+            self.logger.warning("Rate limited on %s. Waiting %ss...", sku, retry_after)
+            await asyncio.sleep(retry_after)
+        else:
+            raise RateLimitError(f"Rate limited fetching inventory for SKU {sku}")
+
+        if response.status_code != 200:
+            raise ShopifyAPIError(
+                f"REST GET {path} failed (HTTP {response.status_code})",
+                details={"response": response.text}
+            )
+
+        levels = response.json().get("inventory_levels", [])
+        quantity = 0
+        if levels:
+            quantity = levels[0].get("available", 0) or 0
+
+        return StockItem._unchecked(
+            sku=sku,
+            quantity=quantity,
+            source="shopify",
+            metadata={
+                "variant_id": variant_info["variant_id"],
+                "inventory_item_id": inventory_item_id,
+                "product_id": variant_info.get("product_id"),
+                "product_title": variant_info.get("product_title", ""),
+            }
+        )
+
+    def get_inventory_by_skus(self, skus: List[str]) -> Dict[str, StockItem]:
+        """
+        Look up the current *available* inventory for many SKUs at once.
+
+        Uses GraphQL ``productVariants`` searches (``sku:A OR sku:B ...``),
+        following cursors 250 variants at a time, instead of one REST
+        round-trip per SKU.
+
+        Returns:
+            Dict mapping SKU → StockItem.  SKUs that do not exist in
+            Shopify are absent from the dict.
+        """
+        wanted = set(skus)
+        location_gid = f"{GID_LOCATION_PREFIX}{self.location_id}"
+        inventory: Dict[str, StockItem] = {}
+        unique_skus = list(dict.fromkeys(skus))
+
+        for start in range(0, len(unique_skus), VARIANT_QUERY_SKU_CHUNK):
+            chunk = unique_skus[start:start + VARIANT_QUERY_SKU_CHUNK]
+            search = " OR ".join(f'sku:"{sku}"' for sku in chunk)
+            cursor: Optional[str] = None
+
+            while True:
+                data = self._graphql(
+                    VARIANTS_BY_SKU_QUERY,
+                    {"query": search, "cursor": cursor, "locationId": location_gid},
+                )
+                variants = data.get("productVariants") or {}
+
+                for node in variants.get("nodes", []):
+                    sku = node.get("sku")
+                    # Shopify search is prefix/fuzzy — keep exact matches only
+                    if sku not in wanted:
+                        continue
+
+                    inventory_item = node.get("inventoryItem") or {}
+                    level = inventory_item.get("inventoryLevel") or {}
+                    quantity = 0
+                    for entry in level.get("quantities", []):
+                        if entry.get("name") == "available":
+                            quantity = entry.get("quantity") or 0
+
+                    product = node.get("product") or {}
+                    inventory[sku] = StockItem._unchecked(
+                        sku=sku,
+                        quantity=quantity,
+                        source="shopify",
+                        metadata={
+                            "variant_id": _gid_to_int(node.get("id")),
+                            "inventory_item_id": _gid_to_int(inventory_item.get("id")),
+                            "product_id": _gid_to_int(product.get("id")),
+                            "product_title": product.get("title", ""),
+                        }
+                    )
+
+                page_info = variants.get("pageInfo") or {}
+                if not page_info.get("hasNextPage"):
+                    break
+                cursor = page_info.get("endCursor")
+
+        self._inventory_cache.update(inventory)
+        self.logger.info(
+            "Fetched Shopify inventory for %d/%d SKUs", len(inventory), len(unique_skus)
+        )
+        return inventory
+
+    def prefetch_inventory(self, skus: List[str]) -> int:
+        """
+        Prime the inventory cache for ``skus`` with bulk GraphQL searches,
+        so later :meth:`get_inventory_by_sku` calls are dict reads.
+
+        Returns:
+            Number of SKUs found in Shopify.
+        """
+        return len(self.get_inventory_by_skus(skus))
+
+    def _remember_quantity(self, sku: str, quantity: int):
+        """Keep a cached StockItem in step with a successful write."""
+        cached = self._inventory_cache.get(sku)
+        if cached is not None:
+            cached.quantity = quantity
+
     # ------------------------------------------------------------------
     # Inventory mutations
     # ------------------------------------------------------------------
@@ -272,7 +579,7 @@ class ShopifyClient(BaseClient):
 
         body = {
             "location_id": int(self.location_id),
-            "inventory_item_id": int(inventory_item_id),
+            "inventory_item_id": inventory_item_id,
             "available": quantity
         }
 
@@ -282,36 +589,195 @@ class ShopifyClient(BaseClient):
                 json_body=body
             )
         except ShopifyAPIError as e:
-            self.logger.error(f"Failed to update inventory for {sku}: {e.message}")
+            self.logger.error("Failed to update inventory for %s: %s", sku, e.message)
             raise
 
-        self.logger.info(f"Updated Shopify inventory for {sku}: {quantity}")
+        self._remember_quantity(sku, quantity)
+        self.logger.info("Updated Shopify inventory for %s: %s", sku, quantity)
         return True
 
+    async def aupdate_inventory(
+        self,
+        sku: str,
+        quantity: int,
+        client: httpx.AsyncClient,
+        inventory_item_id: Optional[int] = None
+    ) -> None:
+        """
+        Async variant of :meth:`update_inventory` for concurrent updates.
+
+        Args:
+            sku: Variant SKU.
+            quantity: Absolute quantity to set.
+            client: Client from :meth:`async_client`.
+            inventory_item_id: Known inventory item ID; resolved via the SKU
+                cache when omitted.
+
+        Raises:
+            SKUNotFoundError: If the SKU does not exist in Shopify.
+            RateLimitError: If every attempt was rate limited.
+            ShopifyAPIError: On any other failed request.
+        """
+        if not inventory_item_id:
+            inventory_item_id = (self._get_sku_map().get(sku) or {}).get("inventory_item_id")
+        if not inventory_item_id:
+            raise SKUNotFoundError(f"SKU not found in Shopify: {sku}")
+
+        path = f"/admin/api/{self.api_version}/inventory_levels/set.json"
+        body = {
+            "location_id": int(self.location_id),
+            "inventory_item_id": inventory_item_id,
+            "available": quantity
+        }
+
+        for _ in range(self.config.api.max_retries):
+            try:
+                response = await client.post(path, json=body)
+            except httpx.HTTPError as e:
+                raise ShopifyAPIError(f"HTTP error on POST {path}: {str(e)}")
+
+            if response.status_code != 429:
+                break
+            retry_after = int(response.headers.get("Retry-After", 2))
+            self.logger.warning("Rate limited on %s. Waiting %ss...", sku, retry_after)
+            await asyncio.sleep(retry_after)
+        else:
+            raise RateLimitError(f"Rate limited updating inventory for SKU {sku}")
+
+        if response.status_code not in (200, 201):
+            raise ShopifyAPIError(
+                f"REST POST {path} failed (HTTP {response.status_code})",
+                details={"response": response.text}
+            )
+
+    def update_inventory_bulk(self, items: List[StockUpdate]) -> List[Dict[str, str]]:
+        """
+        Set the *available* inventory for many SKUs with one GraphQL
+        ``inventorySetQuantities`` mutation per 250 items.
+
+        Args:
+            items: Updates to apply.  Items without an ``inventory_item_id``
+                are resolved via the SKU cache.
+
+        Returns:
+            One ``{"sku", "error"}`` dict per item that was not updated;
+            an empty list means every item succeeded.
+
+        Raises:
+            ShopifyAPIError: If the first mutation is refused outright (HTTP
+                or top-level GraphQL error), i.e. nothing has been applied.
+        """
+        get_sku_map = self._get_sku_map
+        location_gid = f"{GID_LOCATION_PREFIX}{self.location_id}"
+        failures: List[Dict[str, str]] = []
+
+        resolved: List[StockUpdate] = []
+        for item in items:
+            if not item.inventory_item_id:
+                item.inventory_item_id = (get_sku_map().get(item.sku) or {}).get("inventory_item_id")
+            if not item.inventory_item_id:
+                failures.append({"sku": item.sku, "error": f"SKU not found in Shopify: {item.sku}"})
+                continue
+            resolved.append(item)
+
+        for start in range(0, len(resolved), INVENTORY_SET_MAX_QUANTITIES):
+            chunk = resolved[start:start + INVENTORY_SET_MAX_QUANTITIES]
+            variables = {
+                "input": {
+                    "name": "available",
+                    "reason": "correction",
+                    "ignoreCompareQuantity": True,
+                    "quantities": [
+                        {
+                            "inventoryItemId": f"{GID_INVENTORY_ITEM_PREFIX}{entry.inventory_item_id}",
+                            "locationId": location_gid,
+                            "quantity": entry.quantity,
+                        }
+                        for entry in chunk
+                    ],
+                }
+            }
+
+            try:
+                data = self._graphql(INVENTORY_SET_QUANTITIES_MUTATION, variables)
+            except ShopifyAPIError as e:
+                # Refused before anything was applied: let the caller fall
+                # back to per-item updates for the whole call.
+                if start == 0:
+                    raise
+                self.logger.error("Bulk inventory update failed for %d SKUs: %s", len(chunk), e.message)
+                failures.extend({"sku": entry.sku, "error": e.message} for entry in chunk)
+                continue
+
+            payload = data.get("inventorySetQuantities") or {}
+            user_errors = payload.get("userErrors", [])
+
+            # A null adjustment group means nothing in this chunk was applied.
+            if user_errors and not payload.get("inventoryAdjustmentGroup"):
+                message = "; ".join(err.get("message", "") for err in user_errors)
+                failures.extend({"sku": entry.sku, "error": message} for entry in chunk)
+                continue
+
+            for err in user_errors:
+                # field looks like ["input", "quantities", "<index>", "quantity"]
+                field = err.get("field") or []
+                if len(field) > 2 and str(field[2]).isdigit() and int(field[2]) < len(chunk):
+                    failures.append({"sku": chunk[int(field[2])].sku, "error": err.get("message", "")})
+
+        failed = {failure["sku"] for failure in failures}
+        for item in items:
+            if item.sku not in failed:
+                self._remember_quantity(item.sku, item.quantity)
+
+        self.logger.info(
+            "Bulk inventory update: %d ok, %d failed", len(items) - len(failures), len(failures)
+        )
+        return failures
+
     # ------------------------------------------------------------------
     # Bulk helper
     # ------------------------------------------------------------------
 
     def bulk_update_inventory(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Call update_inventory for each item in *updates*."""
+        """
+        Set inventory for many ``{"sku", "quantity"}`` dicts.
+
+        Goes through :meth:`update_inventory_bulk` (one GraphQL mutation per
+        250 items); only if that mutation is refused does it fall back to
+        one :meth:`update_inventory` call per item.
+        """
         results: Dict[str, Any] = {
             "success_count": 0,
             "error_count": 0,
             "errors": []
         }
 
-        for update in updates:
-            sku = update["sku"]
-            qty = update["quantity"]
-
-            try:
-                self.update_inventory(sku, qty)
-                results["success_count"] += 1
-            except Exception as e:
-                results["error_count"] += 1
-                results["errors"].append({"sku": sku, "error": str(e)})
-                self.logger.error(f"Failed to update {sku}: {str(e)}")
+        items = [
+            StockUpdate(
+                update["sku"],
+                update["quantity"],
+                update.get("old_quantity", 0),
+                update.get("name", update["sku"]),
+                update.get("inventory_item_id"),
+            )
+            for update in updates
+        ]
 
+        try:
+            errors = self.update_inventory_bulk(items)
+        except ShopifyAPIError as e:
+            self.logger.warning("Bulk mutation refused (%s); updating per item", e.message)
+            errors = []
+            for item in items:
+                try:
+                    self.update_inventory(item.sku, item.quantity)
+                except (ShopifyAPIError, SKUNotFoundError, RateLimitError, httpx.HTTPError) as exc:
+                    errors.append({"sku": item.sku, "error": str(exc)})
+                    self.logger.error("Failed to update %s: %s", item.sku, exc)
+
+        results["errors"] = errors
+        results["error_count"] = len(errors)
+        results["success_count"] = len(items) - len(errors)
         return results
 
     # ------------------------------------------------------------------
@@ -26,7 +26,12 @@ def cli():
     is_flag=True,
     help="Preview changes without applying them"
 )
-def sync(dry_run: bool):
+@click.option(
+    "--full-resync",
+    is_flag=True,
+    help="Check every SKU against Shopify, ignoring the last-sync shadow file"
+)
+def sync(dry_run: bool, full_resync: bool):
     """
     Execute full stock synchronization from FileMaker to Shopify.
 
@@ -50,7 +55,9 @@ def sync(dry_run: bool):
             label="Synchronizing stock",
             show_eta=False
         ) as bar:
-            result = service.execute_filemaker_to_shopify_sync(dry_run=dry_run)
+            result = service.execute_filemaker_to_shopify_sync(
+                dry_run=dry_run, full_resync=full_resync
+            )
             bar.update(1)
 
         click.echo()
@@ -72,12 +79,13 @@ def sync(dry_run: bool):
 
         # Display errors if any
         if result.errors:
+            summary = result.to_summary_dict(error_limit=10)
             click.echo()
             click.echo(click.style(f"Errors ({len(result.errors)}):", fg="red", bold=True))
-            for i, error in enumerate(result.errors[:10], 1):
-                click.echo(f"  {i}. {error.sku}: {error.message}")
+            for i, error in enumerate(summary["errors"], 1):
+                click.echo(f"  {i}. {error['sku']}: {error['message']}")
 
-            if len(result.errors) > 10:
+            if summary["errors_truncated"]:
                 click.echo(f"  ... and {len(result.errors) - 10} more errors")
                 click.echo("  Check logs/sync.log for full details")
 
@@ -3,12 +3,34 @@
 import hmac
 import hashlib
 import base64
+import binascii
+import re
 from typing import Optional
 
 from ..utils.config import get_config
 from ..utils.logger import get_webhook_logger
 from ..utils.exceptions import WebhookValidationError
 
+# A single-label myshopify.com subdomain, e.g. "my-shop.myshopify.com"
+_SHOP_DOMAIN_RE = re.compile(r"[a-z0-9][a-z0-9\-]*\.myshopify\.com")
+
+
+class SignatureStream:
+    """HMAC-SHA256 of a webhook body fed in as it is received."""
+
+    __slots__ = ("_mac",)
+
+    def __init__(self, secret: bytes):
+        self._mac = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def update(self, chunk: bytes) -> None:
+        """Add the next chunk of the body."""
+        self._mac.update(chunk)
+
+    def digest(self) -> bytes:
+        """Return the raw HMAC of everything fed so far."""
+        return self._mac.digest()
+
 
 class WebhookValidator:
     """Validates Shopify webhook signatures."""
@@ -17,6 +39,7 @@ class WebhookValidator:
         """Initialize webhook validator."""
         config = get_config()
         self.secret = config.env.shopify_webhook_secret
+        self._secret_bytes = self.secret.encode("utf-8")
         self.logger = get_webhook_logger()
         self.validate_enabled = config.webhook.validate_signature
 
@@ -34,49 +57,81 @@ class WebhookValidator:
         Raises:
             WebhookValidationError: If validation fails
         """
+        if not self._signature_required(signature_header):
+            return True
+        self._check_digest(hmac.digest(self._secret_bytes, body, "sha256"), signature_header)
+        return True
+
+    def begin_signature(self) -> SignatureStream:
+        """Start an incremental signature check for a body read in chunks.
+
+        Feed each chunk to the returned stream's ``update`` as it arrives,
+        then call :meth:`finalize_signature`.  Hashing happens while the
+        body is still being received, so no extra pass over it is needed.
+        """
+        return SignatureStream(self._secret_bytes)
+
+    def finalize_signature(
+        self, stream: SignatureStream, signature_header: Optional[str]
+    ) -> bool:
+        """
+        Validate the HMAC accumulated in ``stream``.
+
+        Args:
+            stream: Stream from :meth:`begin_signature`, fed the whole body
+            signature_header: Value of X-Shopify-Hmac-SHA256 header
+
+        Returns:
+            True if signature is valid
+
+        Raises:
+            WebhookValidationError: If validation fails
+        """
+        if not self._signature_required(signature_header):
+            return True
+        self._check_digest(stream.digest(), signature_header)
+        return True
+
+    def _signature_required(self, signature_header: Optional[str]) -> bool:
+        """Return False when validation is disabled; raise if the header is missing."""
         if not self.validate_enabled:
             self.logger.warning("Webhook signature validation is disabled!")
-            return True
+            return False
 
         if not signature_header:
             raise WebhookValidationError(
                 "Missing webhook signature header",
                 details={"header": "X-Shopify-Hmac-SHA256"}
             )
+        return True
 
+    def _check_digest(self, expected: bytes, signature_header: str) -> None:
+        """Compare a computed HMAC against the header, raising on mismatch."""
         try:
-            # Calculate expected signature
-            expected_signature = base64.b64encode(
-                hmac.new(
-                    self.secret.encode('utf-8'),
-                    body,
-                    hashlib.sha256
-                ).digest()
-            ).decode('utf-8')
+            # Compare raw digests: decoding the 44-char header once is
+            # cheaper than base64-encoding every computed HMAC.
+            try:
+                provided = base64.b64decode(signature_header, validate=True)
+            except binascii.Error:
+                provided = b""
 
             # Compare signatures (constant-time comparison)
-            is_valid = hmac.compare_digest(expected_signature, signature_header)
-
-            if not is_valid:
-                raise WebhookValidationError(
-                    "Invalid webhook signature",
-                    details={
-                        "expected": expected_signature[:10] + "...",
-                        "received": signature_header[:10] + "..."
-                    }
-                )
-
-            self.logger.debug("Webhook signature validated successfully")
-            return True
+            is_valid = hmac.compare_digest(expected, provided)
 
         except Exception as e:
-            if isinstance(e, WebhookValidationError):
-                raise
             raise WebhookValidationError(
                 f"Signature validation error: {str(e)}",
                 details={"error": str(e)}
             )
 
+        if not is_valid:
+            raise WebhookValidationError(
+                "Invalid webhook signature",
+                details={"received": signature_header[:10] + "..."}
+            )
+
+        self.logger.debug("Webhook signature validated successfully")
+
     def validate_shopify_domain(self, shop_domain: Optional[str]) -> bool:
         """
         Validate that the shop domain matches expected pattern.
@@ -93,12 +148,12 @@ class WebhookValidator:
         if not shop_domain:
             raise WebhookValidationError("Missing shop domain in webhook")
 
-        # Shopify domains should end with .myshopify.com
-        if not shop_domain.endswith(".myshopify.com"):
+        # Shopify domains are <shop>.myshopify.com
+        if not _SHOP_DOMAIN_RE.fullmatch(shop_domain):
             raise WebhookValidationError(
                 f"Invalid shop domain: {shop_domain}",
                 details={"domain": shop_domain}
             )
 
-        self.logger.debug(f"Shop domain validated: {shop_domain}")
+        self.logger.debug("Shop domain validated: %s", shop_domain)
         return True
@@ -39,6 +39,28 @@ class StockItem:
             "last_updated": self.last_updated.isoformat() if self.last_updated else None
         }
 
+    @classmethod
+    def _unchecked(
+        cls,
+        sku: str,
+        quantity: int,
+        source: str,
+        metadata: Dict[str, Any],
+        last_updated: Optional[datetime] = None
+    ) -> "StockItem":
+        """Build an instance without running ``__post_init__`` validation.
+
+        Internal fast path for API clients whose response structure already
+        guarantees the fields; external callers should use the constructor.
+        """
+        obj = cls.__new__(cls)
+        obj.sku = sku
+        obj.quantity = quantity
+        obj.source = source
+        obj.metadata = metadata
+        obj.last_updated = last_updated
+        return obj
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "StockItem":
         """Create instance from dictionary."""
@@ -53,3 +75,14 @@ class StockItem:
             metadata=data.get("metadata", {}),
             last_updated=last_updated
         )
+
+
+@dataclass(slots=True)
+class StockUpdate:
+    """A pending Shopify quantity change produced by the nightly diff."""
+
+    sku: str
+    quantity: int
+    old_quantity: int
+    name: str
+    inventory_item_id: Optional[int] = None
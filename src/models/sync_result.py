@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Any, Optional
 
 
@@ -26,6 +27,25 @@ class SyncError:
         }
 
 
+@dataclass(slots=True)
+class LineItemError:
+    """A failed line item (or a failed webhook, with no SKU) in a webhook result."""
+
+    sku: Optional[str]
+    message: str
+    title: Optional[str] = None
+    error_type: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary representation."""
+        return {
+            "sku": self.sku,
+            "title": self.title,
+            "error": self.message,
+            "type": self.error_type,
+        }
+
+
 @dataclass
 class SyncResult:
     """Represents the result of a synchronization operation."""
@@ -72,6 +92,12 @@ class SyncResult:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation."""
+        data = self._base_dict()
+        data["errors"] = [error.to_dict() for error in self.errors]
+        return data
+
+    def _base_dict(self) -> Dict[str, Any]:
+        """Scalar fields shared by ``to_dict`` and ``to_summary_dict``."""
         return {
             "success": self.success,
             "updated_count": self.updated_count,
@@ -82,10 +108,16 @@ class SyncResult:
             "duration": round(self.duration, 2),
             "start_time": self.start_time.isoformat() if self.start_time else None,
             "end_time": self.end_time.isoformat() if self.end_time else None,
-            "errors": [error.to_dict() for error in self.errors],
             "metadata": self.metadata
         }
 
+    def to_summary_dict(self, error_limit: int = 10) -> Dict[str, Any]:
+        """Convert to dictionary, serializing at most ``error_limit`` errors."""
+        data = self._base_dict()
+        data["errors"] = [error.to_dict() for error in islice(self.errors, error_limit)]
+        data["errors_truncated"] = len(self.errors) > error_limit
+        return data
+
     def get_summary(self) -> str:
         """Get a human-readable summary."""
         summary_lines = [
@@ -99,7 +131,7 @@ class SyncResult:
 
         if self.errors:
             summary_lines.append(f"\nErrors ({len(self.errors)}):")
-            for error in self.errors[:5]:  # Show first 5 errors
+            for error in islice(self.errors, 5):  # Show first 5 errors
                 summary_lines.append(f"  - {error.sku}: {error.message}")
             if len(self.errors) > 5:
                 summary_lines.append(f"  ... and {len(self.errors) - 5} more errors")
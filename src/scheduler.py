@@ -7,12 +7,18 @@ Single nightly job at a configurable hour (default 22:00 America/Santiago):
   4. Update Shopify inventory.
 """
 
+import asyncio
 import sys
 import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
 
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from .services.sync_service import SyncService
@@ -22,59 +28,145 @@ from .utils.logger import get_sync_logger, get_scheduler_logger
 # Ensure APScheduler's internal exceptions are visible in Railway logs.
 get_scheduler_logger()
 
+def _new_sync_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="nightly-sync")
+
+
+# Single worker thread for the blocking sync.  Threads are spawned lazily,
+# and max_instances=1 already prevents overlapping runs, so one worker is
+# enough and the pool never grows during long syncs.
+_sync_executor = _new_sync_executor()
+
+_BANNER = "=" * 70
+
 
 # ------------------------------------------------------------------
 # Nightly sync job
 # ------------------------------------------------------------------
 
-def _make_nightly_job():
-    """Create the nightly FM → Shopify sync job callable."""
+_sync_service: Optional[SyncService] = None
+_sync_service_lock = threading.Lock()
+
+
+def _get_sync_service() -> SyncService:
+    """Return the process-wide ``SyncService``, built on first use.
+
+    Job closures share it, so re-creating the scheduler (e.g. a dev-reload
+    re-entering the lifespan) does not multiply API connection pools.
+    """
+    global _sync_service
+    service = _sync_service
+    if service is None:
+        with _sync_service_lock:
+            if _sync_service is None:
+                _sync_service = SyncService()
+            service = _sync_service
+    return service
+
+
+def close_sync_service() -> None:
+    """Close the shared ``SyncService`` if one was ever built."""
+    global _sync_service
+    with _sync_service_lock:
+        if _sync_service is not None:
+            _sync_service.close()
+            _sync_service = None
+
+
+def wait_for_nightly_sync() -> None:
+    """Block until a nightly sync running on the sync worker has returned.
+
+    ``AsyncIOScheduler.shutdown`` only cancels the awaiting coroutine, not
+    the sync thread, so call this before ``close_sync_service``.  A fresh
+    worker replaces the old one for a scheduler created afterwards.
+    """
+    global _sync_executor
+    executor = _sync_executor
+    _sync_executor = _new_sync_executor()
+    executor.shutdown(wait=True)
+
+
+def _make_nightly_job(stop_event: Optional[threading.Event] = None):
+    """Create the nightly FM → Shopify sync job callable.
+
+    Args:
+        stop_event: When set, a running sync stops at its next product or
+            batch boundary instead of running to completion.
+    """
     logger = get_sync_logger()
-    sync_service = SyncService()
+    sc = get_config().scheduler
 
     def nightly_job():
-        import sys
-        print("[NIGHTLY] Nightly FM → Shopify sync started", flush=True)
-        logger.info("=" * 70)
-        logger.info(f"Nightly sync job started at {datetime.now()}")
-        logger.info("=" * 70)
-        sys.stdout.flush()
+        # Resolved on the first fire, not at scheduler setup, so web-process
+        # startup doesn't pay for sync-service construction.
+        sync_service = _get_sync_service()
+
+        # Other nights skip SKUs whose FM quantity is unchanged since the
+        # last sync; the weekly full pass repairs Shopify drift from failed
+        # webhooks or manual edits that the shadow file can't see.
+        full_resync = (
+            datetime.now(ZoneInfo(sc.timezone)).weekday() == sc.full_resync_weekday
+        )
+
+        logger.info(_BANNER)
+        logger.info(
+            "Nightly sync job started at %s%s",
+            datetime.now().isoformat(), " (full resync)" if full_resync else ""
+        )
+        logger.info(_BANNER)
 
         try:
-            result = sync_service.execute_nightly_sync()
+            result = sync_service.execute_nightly_sync(
+                full_resync=full_resync, stop_event=stop_event
+            )
 
             logger.info("Nightly job completed:")
-            logger.info(f"  Total items:  {result.total_items}")
-            logger.info(f"  Updated:      {result.updated_count}")
-            logger.info(f"  Failed:       {result.failed_count}")
-            logger.info(f"  Skipped:      {result.skipped_count}")
-            logger.info(f"  Duration:     {result.duration:.2f}s")
+            logger.info("  Total items:  %d", result.total_items)
+            logger.info("  Updated:      %d", result.updated_count)
+            logger.info("  Failed:       %d", result.failed_count)
+            logger.info("  Skipped:      %d", result.skipped_count)
+            logger.info("  Duration:     %.2fs", result.duration)
 
             if not result.success:
-                logger.warning(f"Nightly sync completed with errors")
-
-            print(
-                f"[NIGHTLY] Done — {result.updated_count} updated, "
-                f"{result.failed_count} failed, {result.skipped_count} unchanged",
-                flush=True,
-            )
+                logger.warning("Nightly sync completed with errors")
 
         except Exception as e:
-            logger.error(f"Nightly job failed: {str(e)}", exc_info=True)
-            print(f"[NIGHTLY] Job FAILED: {str(e)}", flush=True)
+            logger.error("Nightly job failed: %s", e, exc_info=True)
 
-        logger.info("=" * 70)
-        sys.stdout.flush()
+        logger.info(_BANNER)
 
     return nightly_job
 
 
+def _make_async_nightly_job(stop_event: Optional[threading.Event] = None):
+    """Create a coroutine job for schedulers running on an asyncio loop.
+
+    The sync itself is blocking I/O, so it is awaited on the dedicated
+    sync worker thread to keep the event loop free for webhook requests.
+    """
+    nightly_job = _make_nightly_job(stop_event)
+
+    async def nightly_job_async():
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_sync_executor, nightly_job)
+
+    return nightly_job_async
+
+
 # ------------------------------------------------------------------
 # Embedded (non-blocking) scheduler — used by the web process
 # ------------------------------------------------------------------
 
-def create_background_scheduler() -> BackgroundScheduler:
-    """Create a ``BackgroundScheduler`` with the nightly sync job.
+def create_background_scheduler(
+    stop_event: Optional[threading.Event] = None,
+) -> AsyncIOScheduler:
+    """Create an ``AsyncIOScheduler`` with the nightly sync job.
+
+    Must be called from inside the running event loop (FastAPI's
+    ``lifespan``); the scheduler runs its jobs on that loop.
+
+    Args:
+        stop_event: Set on shutdown to stop a running sync early.
 
     Returns the scheduler (not started).
     """
@@ -82,10 +174,14 @@ def create_background_scheduler() -> BackgroundScheduler:
     logger = get_sync_logger()
     sc = config.scheduler
 
-    scheduler = BackgroundScheduler(timezone=sc.timezone)
+    scheduler = AsyncIOScheduler(
+        event_loop=asyncio.get_running_loop(),
+        timezone=sc.timezone,
+        job_defaults={"coalesce": sc.coalesce, "max_instances": sc.max_instances},
+    )
 
     scheduler.add_job(
-        func=_make_nightly_job(),
+        func=_make_async_nightly_job(stop_event),
         trigger=CronTrigger(
             hour=sc.nightly_sync_hour,
             minute=sc.nightly_sync_minute,
@@ -100,8 +196,8 @@ def create_background_scheduler() -> BackgroundScheduler:
     )
 
     logger.info(
-        f"Nightly scheduler configured ({sc.timezone}): "
-        f"sync @ {sc.nightly_sync_hour:02d}:{sc.nightly_sync_minute:02d}"
+        "Nightly scheduler configured (%s): sync @ %02d:%02d",
+        sc.timezone, sc.nightly_sync_hour, sc.nightly_sync_minute
     )
     return scheduler
 
@@ -118,30 +214,39 @@ class SyncScheduler:
         self.logger = get_sync_logger()
         sc = self.config.scheduler
 
-        self.scheduler = BlockingScheduler(timezone=sc.timezone)
+        # Set on SIGINT/SIGTERM so a running sync exits early instead of
+        # holding up shutdown until Railway escalates to SIGKILL.
+        self._stopping = threading.Event()
+
+        self.scheduler = BlockingScheduler(
+            timezone=sc.timezone,
+            executors={"default": APSThreadPoolExecutor(max_workers=1)},
+            job_defaults={"coalesce": sc.coalesce, "max_instances": sc.max_instances},
+        )
         signal.signal(signal.SIGINT, self._shutdown_handler)
         signal.signal(signal.SIGTERM, self._shutdown_handler)
 
     def _shutdown_handler(self, signum, frame):
-        self.logger.info(f"Received shutdown signal ({signum}). Stopping scheduler...")
-        self.scheduler.shutdown(wait=True)
+        self.logger.info("Received shutdown signal (%s). Stopping scheduler...", signum)
+        self._stopping.set()
+        self.scheduler.shutdown(wait=False)
         sys.exit(0)
 
     def start(self):
         sc = self.config.scheduler
 
-        self.logger.info("=" * 70)
+        self.logger.info(_BANNER)
         self.logger.info("Nightly Scheduler Starting (standalone)")
-        self.logger.info("=" * 70)
-        self.logger.info(f"Environment:    {self.config.env.environment}")
-        self.logger.info(f"Timezone:       {sc.timezone}")
+        self.logger.info(_BANNER)
+        self.logger.info("Environment:    %s", self.config.env.environment)
+        self.logger.info("Timezone:       %s", sc.timezone)
         self.logger.info(
-            f"Nightly sync:   {sc.nightly_sync_hour:02d}:{sc.nightly_sync_minute:02d}"
+            "Nightly sync:   %02d:%02d", sc.nightly_sync_hour, sc.nightly_sync_minute
         )
-        self.logger.info("=" * 70)
+        self.logger.info(_BANNER)
 
         self.scheduler.add_job(
-            func=_make_nightly_job(),
+            func=_make_nightly_job(self._stopping),
             trigger=CronTrigger(
                 hour=sc.nightly_sync_hour,
                 minute=sc.nightly_sync_minute,
@@ -156,12 +261,14 @@ class SyncScheduler:
         )
 
         self.logger.info("Scheduler started. Press Ctrl+C to stop.")
-        self.logger.info("=" * 70)
+        self.logger.info(_BANNER)
 
         try:
             self.scheduler.start()
         except (KeyboardInterrupt, SystemExit):
             self.logger.info("Scheduler stopped.")
+        finally:
+            close_sync_service()
 
 
 def main():
@@ -170,7 +277,7 @@ def main():
         scheduler.start()
     except Exception as e:
         logger = get_sync_logger()
-        logger.error(f"Scheduler failed to start: {str(e)}", exc_info=True)
+        logger.error("Scheduler failed to start: %s", e, exc_info=True)
         sys.exit(1)
 
 
@@ -2,21 +2,98 @@
 
 Flow:
   1. Fetch all product SKUs from FileMaker (Clasificación == "8").
-  2. For each product, run the ActualizarStock_dapi recalculation script.
-  3. After all products are recalculated, re-fetch stock for every product.
-  4. Update Shopify inventory for each product.
+  2. For each product, run the ActualizarStock_dapi recalculation script
+     (up to FILEMAKER_CONCURRENCY requests in flight).
+  3. As soon as a product's recalculation returns, re-fetch its stock
+     within the same bounded-concurrency pass.
+  4. Look up Shopify inventory batch by batch and push changed quantities
+     (one GraphQL mutation per batch); lookups overlap the mutations.
 """
 
-import sys
-import time
-from typing import List, Dict, Any
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, Iterator, Optional, Tuple
+
+import httpx
 
 from ..api.filemaker_client import FileMakerClient
-from ..api.shopify_client import ShopifyClient
+from ..api.shopify_client import ShopifyClient, VARIANT_QUERY_SKU_CHUNK
+from ..models.product import StockItem, StockUpdate
 from ..models.sync_result import SyncResult
-from ..utils.config import get_config
+from ..utils.config import PROJECT_ROOT, get_config
 from ..utils.logger import get_sync_logger, get_error_logger
-from ..utils.exceptions import SKUNotFoundError
+from ..utils.exceptions import BaseAppException, SKUNotFoundError, ShopifyAPIError, RateLimitError
+from ..utils.rate_limiter import TokenBucket
+
+# Max in-flight FileMaker requests during the recalc / stock-fetch steps
+FILEMAKER_CONCURRENCY = 8
+
+# Max in-flight per-SKU Shopify lookups when the bulk GraphQL query is unavailable
+SHOPIFY_LOOKUP_CONCURRENCY = 20
+
+# Max bulk inventory mutations in flight at once
+SHOPIFY_UPDATE_WORKERS = 4
+
+# Max in-flight per-item inventory updates when the bulk mutation is refused
+SHOPIFY_UPDATE_CONCURRENCY = 10
+
+# Log line for an applied update: name, SKU, old quantity, new quantity
+_APPLIED = "  ✓ %s (SKU: %s): Shopify %d → %d"
+
+# Failures expected from a single FM/Shopify call: recorded against that
+# item.  Anything else is a bug and aborts the run via nightly_sync's
+# top-level handler.
+_ITEM_ERRORS = (BaseAppException, httpx.HTTPError)
+
+# Error-type labels for the exceptions Shopify lookups usually raise;
+# anything else falls back to type(e).__name__.
+_EXC_NAME: Dict[type, str] = {
+    ShopifyAPIError: "ShopifyAPIError",
+    RateLimitError: "RateLimitError",
+    SKUNotFoundError: "SKUNotFoundError",
+    httpx.HTTPStatusError: "HTTPStatusError",
+    httpx.ReadTimeout: "ReadTimeout",
+    httpx.ConnectError: "ConnectError",
+}
+
+
+class _LookupOutcome:
+    """What the Step 4 producer learned besides the updates it queued."""
+
+    __slots__ = ("errors", "missing", "unchanged", "failure")
+
+    def __init__(self):
+        self.errors: Dict[str, Exception] = {}
+        self.missing: List[str] = []
+        self.unchanged = 0
+        self.failure: Optional[Exception] = None
+
+
+def _drain(pending: "queue.Queue[Optional[StockUpdate]]") -> Iterator[StockUpdate]:
+    """Yield queued updates until the producer's ``None`` sentinel."""
+    while True:
+        update = pending.get()
+        if update is None:
+            return
+        yield update
+
+
+def _chunked(items: Iterable[StockUpdate], size: int) -> Iterator[List[StockUpdate]]:
+    """Yield lists of up to ``size`` items as soon as each one fills."""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
 
 
 class FileMakerSyncService:
@@ -28,19 +105,38 @@ class FileMakerSyncService:
         self.error_logger = get_error_logger()
         self.filemaker_client = FileMakerClient()
         self.shopify_client = ShopifyClient()
+        # Replaced by each nightly_sync call's stop_event
+        self._stopping = threading.Event()
+
+        # Capacity-aware pacing: callers only wait once the burst is spent.
+        fm = self.config.filemaker
+        self._fm_limiter = TokenBucket(rate=fm.requests_per_second, capacity=fm.request_burst)
+        self._shopify_limiter = TokenBucket(
+            rate=1 / self.config.shopify.rate_limit_delay, capacity=SHOPIFY_UPDATE_WORKERS
+        )
 
     # ------------------------------------------------------------------
     # Main nightly sync
     # ------------------------------------------------------------------
 
-    def nightly_sync(self) -> SyncResult:
+    def nightly_sync(
+        self, full_resync: bool = False, stop_event: Optional[threading.Event] = None
+    ) -> SyncResult:
         """
         Execute the full nightly sync:
           Step 1: Fetch all products from FM.
-          Step 2: Recalculate each product in FM (with delay).
-          Step 3: Re-fetch stock for all products.
-          Step 4: Update Shopify inventory.
+          Step 2: Recalculate each product in FM (bounded concurrency).
+          Step 3: Re-fetch its stock right after its own recalc.
+          Step 4: Update Shopify inventory for SKUs whose FM quantity
+                  differs from the one synced last time.
+
+        Args:
+            full_resync: Ignore the shadow file and compare every SKU
+                against Shopify (repairs drift from manual Shopify edits).
+            stop_event: Set by the scheduler on shutdown; the sync stops at the
+                next product or batch boundary and returns its partial result.
         """
+        self._stopping = stop_event or threading.Event()
         result = SyncResult(success=True)
         self.logger.info("=" * 60)
         self.logger.info("NIGHTLY SYNC — Starting")
@@ -50,113 +146,139 @@ class FileMakerSyncService:
             # ── Step 1: Fetch all product SKUs ────────────────────────
             self.logger.info("Step 1/4: Fetching all product SKUs from FileMaker...")
             self.filemaker_client.authenticate()
-            products = self.filemaker_client.get_all_products()
-            result.total_items = len(products)
 
-            self.logger.info(f"Found {len(products)} products in FileMaker")
-            print(f"[SYNC] Step 1: Fetched {len(products)} products from FM", flush=True)
+            # One streaming pass keeps just the SKU order and a name lookup
+            # (for log/error labels) instead of a list of product dicts.
+            skus: List[str] = []
+            name_by_sku: Dict[str, str] = {}
+            for product in self.filemaker_client.iter_all_products():
+                sku = product["sku"]
+                skus.append(sku)
+                name_by_sku[sku] = product["name"]
+            result.total_items = len(skus)
+
+            self.logger.info("Found %d products in FileMaker", len(skus))
 
-            if not products:
+            if not skus:
                 self.logger.warning("No products found — nothing to sync")
                 result.finalize()
                 return result
 
-            # ── Step 2: Recalculate each product ──────────────────────
-            self.logger.info("Step 2/4: Recalculating stock for each product...")
-            print("[SYNC] Step 2: Recalculating stock for each product...", flush=True)
+            # Steps 2-3 run as one pass: each product's stock is fetched as
+            # soon as its own recalc finishes, so fetches for early products
+            # overlap recalcs for later ones on the shared async client.
+            self.logger.info("Steps 2-3/4: Recalculating and re-fetching stock for each product...")
 
-            recalc_errors: List[Dict[str, str]] = []
-            for i, product in enumerate(products, 1):
-                sku = product["sku"]
-                name = product["name"]
-                try:
-                    self.filemaker_client.recalculate_stock(sku)
-                    if i % 20 == 0 or i == len(products):
-                        self.logger.info(f"  Recalculated {i}/{len(products)}")
-                except Exception as e:
-                    self.logger.error(f"  ✗ Recalc failed for {name} (SKU: {sku}): {str(e)}")
-                    self.error_logger.error(f"Recalc error for {sku}: {str(e)}")
-                    recalc_errors.append({"sku": sku, "name": name, "error": str(e)})
-
-                time.sleep(0.5)  # Avoid overwhelming FileMaker
-
-            self.logger.info(
-                f"Step 2 complete: {len(products) - len(recalc_errors)} OK, "
-                f"{len(recalc_errors)} failed"
-            )
-            print(
-                f"[SYNC] Step 2 done: {len(products) - len(recalc_errors)} recalculated, "
-                f"{len(recalc_errors)} failed",
-                flush=True,
-            )
-
-            # ── Step 3: Re-fetch stock for all products ───────────────
-            self.logger.info("Step 3/4: Fetching updated stock from FileMaker...")
-            print("[SYNC] Step 3: Fetching updated stock from FM...", flush=True)
+            # Loop invariants bound once; the per-product loop below runs N times
+            total = len(skus)
+            log_error = self.logger.error
+            log_debug = self.logger.debug
+            error_log = self.error_logger.error
+            debug = self.logger.isEnabledFor(logging.DEBUG)
 
+            recalc_errors: List[Dict[str, str]] = []
             stock_map: Dict[str, int] = {}
             stock_errors: List[Dict[str, str]] = []
 
-            for i, product in enumerate(products, 1):
-                sku = product["sku"]
-                name = product["name"]
-                try:
-                    quantity = self.filemaker_client.get_stock(sku)
+            with self._filemaker_async_session() as fm_session:
+                outcomes = self._run_per_product(
+                    skus, self._arecalculate_and_fetch, fm_session
+                )
+
+            for i, (sku, recalc_outcome, error) in enumerate(outcomes, 1):
+                name = name_by_sku[sku]
+                if recalc_outcome is not None:
+                    recalc_error, quantity = recalc_outcome
+                    if recalc_error is not None:
+                        log_error("  ✗ Recalc failed for %s (SKU: %s): %s", name, sku, recalc_error)
+                        error_log("Recalc error for %s: %s", sku, recalc_error)
+                        recalc_errors.append({"sku": sku, "name": name, "error": str(recalc_error)})
+                    elif debug:
+                        log_debug("  [%d/%d] Recalculated %s (SKU: %s)", i, total, name, sku)
                     stock_map[sku] = quantity
-                except Exception as e:
-                    self.logger.error(f"  ✗ Stock fetch failed for {name} (SKU: {sku}): {str(e)}")
-                    self.error_logger.error(f"Stock fetch error for {sku}: {str(e)}")
-                    stock_errors.append({"sku": sku, "name": name, "error": str(e)})
+                    continue
+                log_error("  ✗ Stock fetch failed for %s (SKU: %s): %s", name, sku, error)
+                error_log("Stock fetch error for %s: %s", sku, error)
+                stock_errors.append({"sku": sku, "name": name, "error": str(error)})
 
             self.logger.info(
-                f"Step 3 complete: {len(stock_map)} stock values fetched, "
-                f"{len(stock_errors)} failed"
+                "Steps 2-3 complete: %d recalc failed, %d stock values fetched, %d failed",
+                len(recalc_errors), len(stock_map), len(stock_errors)
             )
+            if self._stopping.is_set():
+                return self._interrupted(result, "Steps 2-3")
 
             # ── Step 4: Update Shopify inventory ──────────────────────
-            self.logger.info(f"Step 4/4: Updating {len(stock_map)} products in Shopify...")
-            print(f"[SYNC] Step 4: Updating {len(stock_map)} products in Shopify...", flush=True)
+            # SKUs whose FM quantity matches the last synced one are assumed
+            # to be in step with Shopify and are not looked up at all.
+            use_shadow = self.config.sync.enable_diff_check and not full_resync
+            shadow = self._load_shadow() if use_shadow else {}
+            if shadow:
+                to_sync = {sku: qty for sku, qty in stock_map.items() if shadow.get(sku) != qty}
+            else:
+                to_sync = stock_map
+            shadow_skipped = len(stock_map) - len(to_sync)
+
+            self.logger.info(
+                "Step 4/4: Updating %d products in Shopify (%d unchanged since last sync)...",
+                len(to_sync), shadow_skipped
+            )
 
             # Invalidate Shopify SKU cache so we get fresh product data
             self.shopify_client.invalidate_cache()
 
-            updated = 0
-            skipped = 0
-            update_errors: List[Dict[str, str]] = []
+            # Pipeline: a producer thread looks up Shopify inventory one
+            # chunk of SKUs at a time and queues a StockUpdate for each
+            # changed quantity, while this thread flushes full batches.
+            # Lookups for the next chunk overlap mutations for the last batch.
+            lookups = _LookupOutcome()
+            pending: "queue.Queue[Optional[StockUpdate]]" = queue.Queue(
+                maxsize=self.config.sync.batch_size * 2
+            )
+            producer = threading.Thread(
+                target=self._produce_updates,
+                args=(to_sync, name_by_sku, pending, lookups),
+                name="shopify-lookup",
+                daemon=True,
+            )
+            producer.start()
+            updated, batch_errors = self._execute_updates_in_batches(
+                _drain(pending), result
+            )
+            producer.join()
+            if lookups.failure is not None:
+                raise lookups.failure
 
-            for i, (sku, fm_quantity) in enumerate(stock_map.items(), 1):
-                name = next(
-                    (p["name"] for p in products if p["sku"] == sku), sku
+            update_errors: List[Dict[str, str]] = []
+            add_error = result.add_error
+            get_name = name_by_sku.get
+            exc_name = _EXC_NAME.get
+            for sku, e in lookups.errors.items():
+                name = get_name(sku, sku)
+                log_error("  ✗ Shopify lookup failed for %s (SKU: %s): %s", name, sku, e)
+                error_log("Shopify lookup error for %s: %s", sku, e)
+                update_errors.append({"sku": sku, "name": name, "error": str(e)})
+                add_error(sku, exc_name(type(e)) or type(e).__name__, str(e))
+
+            # A store missing most of the catalog makes this loop catalog-sized
+            log_warning = self.logger.warning
+            for sku in lookups.missing:
+                log_warning("  ✗ NOT IN SHOPIFY: %s (SKU: %s)", get_name(sku, sku), sku)
+                add_error(sku, "SKUNotFoundError", f"Not in Shopify: {sku}")
+
+            update_errors.extend(batch_errors)
+            skipped = lookups.unchanged + shadow_skipped
+
+            # Remember what Shopify now matches; SKUs with any error this
+            # run (recalc, lookup or update) are left out so the next sync
+            # looks them up again.
+            if self.config.sync.shadow_file and not self._stopping.is_set():
+                failed = {error.sku for error in result.errors}
+                failed.update(error["sku"] for error in recalc_errors)
+                failed.update(error["sku"] for error in update_errors)
+                self._save_shadow(
+                    {sku: qty for sku, qty in stock_map.items() if sku not in failed}
                 )
-                try:
-                    # Get current Shopify inventory to check if update needed
-                    shopify_item = self.shopify_client.get_inventory_by_sku(sku)
-
-                    if not shopify_item:
-                        self.logger.warning(f"  ✗ NOT IN SHOPIFY: {name} (SKU: {sku})")
-                        result.add_error(sku, "SKUNotFoundError", f"Not in Shopify: {sku}")
-                        continue
-
-                    shopify_qty = shopify_item.quantity
-
-                    if shopify_qty == fm_quantity:
-                        skipped += 1
-                        continue
-
-                    # Needs update
-                    self.shopify_client.update_inventory(sku, fm_quantity)
-                    updated += 1
-                    self.logger.info(
-                        f"  ✓ {name} (SKU: {sku}): Shopify {shopify_qty} → {fm_quantity}"
-                    )
-
-                except Exception as e:
-                    self.logger.error(
-                        f"  ✗ Shopify update failed for {name} (SKU: {sku}): {str(e)}"
-                    )
-                    self.error_logger.error(f"Shopify update error for {sku}: {str(e)}")
-                    update_errors.append({"sku": sku, "name": name, "error": str(e)})
-                    result.add_error(sku, type(e).__name__, str(e))
 
             result.updated_count = updated
             result.skipped_count = skipped
@@ -167,31 +289,422 @@ class FileMakerSyncService:
             self.logger.info("=" * 60)
             self.logger.info("NIGHTLY SYNC SUMMARY")
             self.logger.info("=" * 60)
-            self.logger.info(f"  Total products:     {result.total_items}")
-            self.logger.info(f"  Recalc errors:      {len(recalc_errors)}")
-            self.logger.info(f"  Stock fetch errors: {len(stock_errors)}")
-            self.logger.info(f"  Shopify updated:    {updated}")
-            self.logger.info(f"  Shopify skipped:    {skipped}")
-            self.logger.info(f"  Shopify errors:     {len(update_errors)}")
-            self.logger.info(f"  Duration:           {result.duration:.2f}s")
+            self.logger.info("  Total products:     %d", result.total_items)
+            self.logger.info("  Recalc errors:      %d", len(recalc_errors))
+            self.logger.info("  Stock fetch errors: %d", len(stock_errors))
+            self.logger.info("  Shopify updated:    %d", updated)
+            self.logger.info("  Shopify skipped:    %d", skipped)
+            self.logger.info("  Shopify errors:     %d", len(update_errors))
+            self.logger.info("  Duration:           %.2fs", result.duration)
             self.logger.info("=" * 60)
-            sys.stdout.flush()
-
-            print(
-                f"[SYNC] Done — recalc:{len(products) - len(recalc_errors)}ok "
-                f"updated:{updated} skipped:{skipped} errors:{len(update_errors)}",
-                flush=True,
-            )
 
         except Exception as e:
-            self.logger.error(f"NIGHTLY SYNC CRITICAL FAILURE: {str(e)}", exc_info=True)
-            print(f"[SYNC] CRITICAL FAILURE: {str(e)}", flush=True)
+            self.logger.error("NIGHTLY SYNC CRITICAL FAILURE: %s", e, exc_info=True)
             result.success = False
             result.add_error("SYSTEM", "CriticalError", str(e))
             result.finalize()
 
         return result
 
+    def _shadow_path(self) -> Optional[Path]:
+        """Configured shadow file, anchored at the project root if relative."""
+        shadow_file = self.config.sync.shadow_file
+        if not shadow_file:
+            return None
+        return PROJECT_ROOT / shadow_file
+
+    def _load_shadow(self) -> Dict[str, int]:
+        """Read the last synced FM quantity per SKU ({} if unavailable)."""
+        path = self._shadow_path()
+        if path is None:
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable shadow file %s: %s", path, e)
+            return {}
+
+    def _save_shadow(self, snapshot: Dict[str, int]) -> None:
+        """Atomically replace the shadow file with ``snapshot``."""
+        path = self._shadow_path()
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning("Could not write shadow file %s: %s", path, e)
+
+    @contextmanager
+    def _filemaker_async_session(
+        self,
+    ) -> Iterator[Tuple[asyncio.Runner, httpx.AsyncClient, asyncio.Lock]]:
+        """Event loop, async FM client and auth lock for the per-product pass."""
+        with asyncio.Runner() as runner:
+            client = self.filemaker_client.async_client(FILEMAKER_CONCURRENCY)
+            try:
+                yield runner, client, asyncio.Lock()
+            finally:
+                runner.run(client.aclose())
+
+    def _run_per_product(
+        self,
+        skus: List[str],
+        call: Callable[..., Awaitable[Any]],
+        fm_session: Tuple[asyncio.Runner, httpx.AsyncClient, asyncio.Lock],
+    ) -> List[Tuple[str, Any, Optional[Exception]]]:
+        """
+        Run an async FileMaker call for every SKU with bounded concurrency.
+
+        Up to ``FILEMAKER_CONCURRENCY`` requests share the session's async
+        client and token.  Products not yet started when shutdown is
+        requested are left out of the result.
+
+        Args:
+            skus: Product SKUs from Step 1.
+            call: Coroutine function taking ``(sku, client, auth_lock)``.
+            fm_session: From :meth:`_filemaker_async_session`.
+
+        Returns:
+            One ``(sku, return value, exception or None)`` per SKU run.
+        """
+        runner, client, auth_lock = fm_session
+        stopping = self._stopping
+        limiter = self._fm_limiter
+
+        async def _gather_calls():
+            sem = asyncio.Semaphore(FILEMAKER_CONCURRENCY)
+
+            async def one(sku: str):
+                async with sem:
+                    await limiter.acquire_async()
+                    if stopping.is_set():
+                        return None
+                    try:
+                        return sku, await call(sku, client, auth_lock), None
+                    except _ITEM_ERRORS as e:
+                        return sku, None, e
+
+            return await asyncio.gather(*(one(sku) for sku in skus))
+
+        return [outcome for outcome in runner.run(_gather_calls()) if outcome is not None]
+
+    async def _arecalculate_and_fetch(
+        self,
+        sku: str,
+        client: httpx.AsyncClient,
+        auth_lock: asyncio.Lock,
+    ) -> Tuple[Optional[Exception], int]:
+        """
+        Recalculate one product in FM, then fetch its updated stock.
+
+        A failed recalc does not stop the fetch (the stored stock is still
+        worth syncing); a failed fetch raises.
+
+        Returns:
+            ``(recalc exception or None, stock quantity)``.
+        """
+        recalc_error: Optional[Exception] = None
+        try:
+            await self.filemaker_client.arecalculate_stock(sku, client, auth_lock)
+        except _ITEM_ERRORS as e:
+            recalc_error = e
+
+        # Second request for this product: pay for its own token
+        await self._fm_limiter.acquire_async()
+        quantity = await self.filemaker_client.aget_stock(sku, client, auth_lock)
+        return recalc_error, quantity
+
+    def _interrupted(self, result: SyncResult, step: str) -> SyncResult:
+        """Finalize a sync that stopped early because of a shutdown request."""
+        self.logger.warning("Shutdown requested — nightly sync stopped during %s", step)
+        result.success = False
+        result.add_error("SYSTEM", "Interrupted", f"Shutdown requested during {step}")
+        result.finalize()
+        return result
+
+    # ------------------------------------------------------------------
+    # Shopify lookups
+    # ------------------------------------------------------------------
+
+    def _produce_updates(
+        self,
+        stock_map: Dict[str, int],
+        name_by_sku: Dict[str, str],
+        pending: "queue.Queue[Optional[StockUpdate]]",
+        lookups: "_LookupOutcome",
+    ) -> None:
+        """
+        Producer side of the Step 4 pipeline (runs on its own thread).
+
+        Looks up Shopify inventory one search-sized chunk of SKUs at a time
+        (a single GraphQL ``productVariants`` query each, or concurrent
+        per-SKU lookups once that fails) and queues a :class:`StockUpdate`
+        for every SKU that needs pushing.
+        Lookup errors, missing SKUs and the unchanged count are collected
+        on ``lookups`` for the caller to record after ``join()``.  A
+        ``None`` sentinel is always queued last.
+        """
+        diff_check = self.config.sync.enable_diff_check
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        stopping = self._stopping
+        get_inventory_by_skus = self.shopify_client.get_inventory_by_skus
+        put = pending.put
+        get_name = name_by_sku.get
+        skus = list(stock_map)
+        use_bulk = True
+
+        try:
+            for start in range(0, len(skus), VARIANT_QUERY_SKU_CHUNK):
+                if stopping.is_set():
+                    break
+                chunk = skus[start:start + VARIANT_QUERY_SKU_CHUNK]
+
+                errors: Dict[str, Exception] = {}
+                if use_bulk:
+                    try:
+                        found = get_inventory_by_skus(chunk)
+                    except ShopifyAPIError as e:
+                        self.logger.warning(
+                            "Bulk inventory query failed (%s) — falling back to concurrent per-SKU lookups",
+                            e.message
+                        )
+                        use_bulk = False
+                if not use_bulk:
+                    found, errors = self._fetch_inventory_concurrently(chunk)
+                lookups.errors.update(errors)
+
+                # Diff — only SKUs whose quantity changed are pushed
+                # (every found SKU when sync.enable_diff_check is off).
+                # Whole-chunk comprehensions keep no-op rows out of any
+                # per-item branching or logging.
+                missing = [sku for sku in chunk if sku not in found and sku not in errors]
+                changed = [
+                    (sku, stock_map[sku], found[sku])
+                    for sku in chunk
+                    if sku in found and (not diff_check or found[sku].quantity != stock_map[sku])
+                ]
+                unchanged = len(chunk) - len(missing) - len(errors) - len(changed)
+
+                lookups.missing.extend(missing)
+                lookups.unchanged += unchanged
+                if debug:
+                    self.logger.debug(
+                        "  Lookup chunk: %d changed, %d unchanged, %d missing, %d failed",
+                        len(changed), unchanged, len(missing), len(errors)
+                    )
+
+                for sku, quantity, item in changed:
+                    put(StockUpdate(
+                        sku,
+                        quantity,
+                        item.quantity,
+                        get_name(sku, sku),
+                        item.metadata.get("inventory_item_id"),
+                    ))
+        except Exception as e:
+            lookups.failure = e
+        finally:
+            pending.put(None)
+
+    def _fetch_inventory_concurrently(
+        self, skus: List[str]
+    ) -> Tuple[Dict[str, StockItem], Dict[str, Exception]]:
+        """
+        Look up Shopify inventory per SKU with bounded concurrency.
+
+        Duplicate SKUs are coalesced: the first lookup creates a Future and
+        later callers await that same Future instead of issuing another GET.
+        The in-flight map lives only for this call.
+
+        Returns:
+            (SKU → StockItem for SKUs found, SKU → exception for failed lookups)
+        """
+        async def _gather_checks() -> List[Tuple[str, Optional[StockItem], Optional[Exception]]]:
+            sem = asyncio.Semaphore(SHOPIFY_LOOKUP_CONCURRENCY)
+            inflight: Dict[str, asyncio.Future] = {}
+
+            async with self.shopify_client.async_client() as client:
+                async def check_one(sku: str):
+                    async with sem:
+                        try:
+                            item = await self.shopify_client.aget_inventory_by_sku(sku, client)
+                            return sku, item, None
+                        except _ITEM_ERRORS as e:
+                            return sku, None, e
+
+                async def lookup(sku: str):
+                    if sku not in inflight:
+                        inflight[sku] = asyncio.ensure_future(check_one(sku))
+                    return await inflight[sku]
+
+                return await asyncio.gather(*(lookup(sku) for sku in skus))
+
+        found: Dict[str, StockItem] = {}
+        errors: Dict[str, Exception] = {}
+        for sku, item, error in asyncio.run(_gather_checks()):
+            if error is not None:
+                errors[sku] = error
+            elif item is not None:
+                found[sku] = item
+
+        return found, errors
+
+    # ------------------------------------------------------------------
+    # Shopify batch updates
+    # ------------------------------------------------------------------
+
+    def _execute_updates_in_batches(
+        self, updates: Iterable[StockUpdate], result: SyncResult
+    ) -> Tuple[int, List[Dict[str, str]]]:
+        """
+        Push quantity updates to Shopify, one bulk mutation per batch.
+
+        ``updates`` is consumed lazily: each batch is submitted as soon as it
+        fills, so mutations start while the producer is still diffing.
+
+        Args:
+            updates: Pending quantity changes from the diff step.
+            result: Sync result that receives one error per failed SKU.
+
+        Returns:
+            (number of SKUs updated, list of failed updates)
+        """
+        batch_size = self.config.sync.batch_size
+        success_count = 0
+        failures: List[Dict[str, str]] = []
+
+        stopping = self._stopping
+        limiter = self._shopify_limiter
+        update_inventory_bulk = self.shopify_client.update_inventory_bulk
+        record_failure = self._record_failure
+        log_info = self.logger.info
+        log_debug = self.logger.debug
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+
+        def push(batch: List[StockUpdate]) -> Optional[List[Dict[str, str]]]:
+            # Batches still queued when shutdown is requested are not sent.
+            if stopping.is_set():
+                return None
+            limiter.acquire()
+            try:
+                return update_inventory_bulk(batch)
+            except RateLimitError:
+                # The client already slept Retry-After before raising; retry
+                # once, and a second 429 sends the batch to the per-item path.
+                limiter.acquire()
+                return update_inventory_bulk(batch)
+
+        # Batches are independent mutations, so several are kept in flight
+        # at once; Shopify's cost bucket still paces each call.
+        with ThreadPoolExecutor(max_workers=SHOPIFY_UPDATE_WORKERS) as executor:
+            futures = {}
+            batches = _chunked(updates, batch_size)
+            for batch_num, batch in enumerate(batches, 1):
+                futures[executor.submit(push, batch)] = (batch_num, batch)
+
+            refused: List[StockUpdate] = []
+            for future in as_completed(futures):
+                batch_num, batch = futures[future]
+                try:
+                    errors = future.result()
+                except (ShopifyAPIError, RateLimitError) as e:
+                    self.logger.warning(
+                        "  Bulk mutation refused for %d updates (%s) — retrying per item",
+                        len(batch), e.message
+                    )
+                    refused.extend(batch)
+                    continue
+                except _ITEM_ERRORS as e:
+                    errors = [{"sku": update.sku, "error": str(e)} for update in batch]
+
+                if errors is None:
+                    self.logger.warning("  Batch of %d updates skipped: shutdown requested", len(batch))
+                    continue
+
+                # Most batches apply cleanly: count with a local int and
+                # only build error records for the SKUs that failed.
+                # Applied SKUs are logged at DEBUG; INFO gets one line per batch.
+                failed = {error["sku"]: error["error"] for error in errors} if errors else {}
+                for update in batch:
+                    error = failed.get(update.sku)
+                    if error is None:
+                        success_count += 1
+                        if debug:
+                            log_debug(_APPLIED, update.name, update.sku, update.old_quantity, update.quantity)
+                    else:
+                        record_failure(update, error, failures, result)
+                log_info(
+                    "  Batch %d: %d ok, %d failed",
+                    batch_num, len(batch) - len(failed), len(failed)
+                )
+
+        if refused and not stopping.is_set():
+            failed_count = 0
+            for update, error in self._update_inventory_concurrently(refused):
+                if error is None:
+                    success_count += 1
+                    if debug:
+                        log_debug(_APPLIED, update.name, update.sku, update.old_quantity, update.quantity)
+                else:
+                    failed_count += 1
+                    record_failure(update, str(error), failures, result)
+            log_info(
+                "  Per-item retry: %d ok, %d failed",
+                len(refused) - failed_count, failed_count
+            )
+
+        return success_count, failures
+
+    def _update_inventory_concurrently(
+        self, updates: List[StockUpdate]
+    ) -> List[Tuple[StockUpdate, Optional[Exception]]]:
+        """
+        Push updates one REST call per item with bounded concurrency.
+
+        Fallback for when the bulk mutation is refused.  Pacing comes from
+        the semaphore and the 429 ``Retry-After`` handling in the client.
+
+        Returns:
+            One ``(update, exception or None)`` pair per update.
+        """
+        async def _gather_updates() -> List[Tuple[StockUpdate, Optional[Exception]]]:
+            sem = asyncio.Semaphore(SHOPIFY_UPDATE_CONCURRENCY)
+
+            async with self.shopify_client.async_client() as client:
+                async def one(update: StockUpdate):
+                    async with sem:
+                        try:
+                            await self.shopify_client.aupdate_inventory(
+                                update.sku, update.quantity, client, update.inventory_item_id
+                            )
+                            return update, None
+                        except _ITEM_ERRORS as e:
+                            return update, e
+
+                return await asyncio.gather(*(one(update) for update in updates))
+
+        return asyncio.run(_gather_updates())
+
+    def _record_failure(
+        self,
+        update: StockUpdate,
+        error: str,
+        failures: List[Dict[str, str]],
+        result: SyncResult,
+    ) -> None:
+        """Log a failed update and add it to ``failures`` and ``result``."""
+        sku = update.sku
+        name = update.name
+        self.logger.error("  ✗ Shopify update failed for %s (SKU: %s): %s", name, sku, error)
+        self.error_logger.error("Shopify update error for %s: %s", sku, error)
+        failures.append({"sku": sku, "name": name, "error": error})
+        result.add_error(sku, "ShopifyAPIError", error)
+
     # ------------------------------------------------------------------
     # Cleanup
     # ------------------------------------------------------------------
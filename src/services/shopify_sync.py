@@ -1,157 +1,365 @@
 """Shopify order webhook → FileMaker stock decrement (real-time).
 
-Flow per line item:
-  1. Create movement record in FM (Inv_Cant_Salida).
-  2. Run ActualizarStock_dapi script for that SKU.
-  3. Fetch updated Inventario from FM.
-  4. Update Shopify inventory for that SKU.
+Line items are collapsed by SKU first (quantities summed), then:
+  1. Create movement record in FM (Inv_Cant_Salida), per SKU.
+  2. Run ActualizarStock_dapi script, per SKU.
+     Steps 1-2 run concurrently across SKUs.
+  3. Fetch updated Inventario from FM (one request for all SKUs).
+  4. Update Shopify inventory (one mutation for all SKUs).
 """
 
-from typing import Dict, Any
+import asyncio
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
 
 from ..api.filemaker_client import FileMakerClient
 from ..api.shopify_client import ShopifyClient
-from ..utils.logger import get_webhook_logger, get_error_logger
+from ..models.product import StockItem, StockUpdate
+from ..models.sync_result import LineItemError
+from ..utils.exceptions import BaseAppException, FileMakerAPIError, ShopifyAPIError
+from ..utils.logger import (
+    get_error_logger,
+    get_webhook_logger,
+    reset_log_context,
+    set_log_context,
+)
+
+# Max SKUs from one order processed at the same time
+LINE_ITEM_CONCURRENCY = 5
+
+# Failures expected from the FM/Shopify calls for one SKU: recorded against
+# that SKU.  Anything else propagates to the webhook-level handler.
+_ITEM_ERRORS = (BaseAppException, httpx.HTTPError)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_shared_client() -> FileMakerClient:
+    """Return the process-wide ``FileMakerClient``, built on first use.
+
+    Every webhook service instance shares it, so orders reuse the pooled
+    (HTTP/2) connection to FileMaker instead of opening a new one each.
+    """
+    return FileMakerClient()
+
+
+def close_shared_client() -> None:
+    """Close the shared ``FileMakerClient`` if one was ever built."""
+    if _get_shared_client.cache_info().currsize:
+        _get_shared_client().close()
+        _get_shared_client.cache_clear()
 
 
 class ShopifySyncService:
-    """Process Shopify order webhooks and update FM + Shopify inventory."""
+    """Process Shopify order webhooks and update FM + Shopify inventory.
+
+    One instance is meant to live for the whole server process and is
+    shared by the order batcher and the refund workers, so its Shopify
+    connection pool survives between webhooks.  Nothing per-webhook is
+    kept on the instance, and both HTTP clients are thread-safe.
+    """
 
     def __init__(self):
         self.logger = get_webhook_logger()
         self.error_logger = get_error_logger()
-        self.fm = FileMakerClient()
+        self.fm = _get_shared_client()
         self.shopify = ShopifyClient()
 
     def process_order_webhook(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a Shopify order webhook.
 
-        For each line item with a SKU:
-          1. create_movement(sku, quantity_sold)
-          2. recalculate_stock(sku)
-          3. get_stock(sku)  → new_quantity
-          4. shopify.update_inventory(sku, new_quantity)
+        Line items sharing a SKU are merged (quantities summed), then:
+          1. create_movement(sku, total quantity_sold)  — per SKU
+          2. recalculate_stock(sku)                     — per SKU
+          3. get_stocks(all SKUs)  → new quantities
+          4. shopify.update_inventory_bulk(all SKUs)
 
         Args:
             webhook_data: Parsed JSON body from the Shopify webhook.
 
         Returns:
-            Dict with success flag, counts, and any per-item errors.
+            Dict with success flag, counts, and any per-item errors
+            (``LineItemError`` records).
         """
         result: Dict[str, Any] = {
             "success": True,
             "order_id": None,
             "order_name": None,
             "items_processed": 0,
+            "line_items_seen": 0,
             "errors": [],
         }
 
+        # Per-item log lines below get the order prefix from the log context
+        log_context = set_log_context(f"order {webhook_data.get('name')}")
+        # The client outlives this webhook; look variants up afresh so
+        # products added or re-created in Shopify since are found.
+        self.shopify.invalidate_cache()
         try:
             order_id = webhook_data.get("id")
             order_name = webhook_data.get("name")
             result["order_id"] = order_id
             result["order_name"] = order_name
 
-            self.logger.info(f"Processing order webhook: {order_name} (ID: {order_id})")
+            self.logger.info("Processing order webhook: %s (ID: %s)", order_name, order_id)
 
             line_items = webhook_data.get("line_items", [])
             if not line_items:
-                self.logger.warning(f"No line items in order {order_name}")
+                self.logger.warning("No line items in order")
                 return result
 
-            self.logger.info(f"Found {len(line_items)} line items in order {order_name}")
+            self.logger.info("Found %d line items", len(line_items))
+            result["line_items_seen"] = len(line_items)
 
             # Authenticate FM once for the whole order
             self.fm.authenticate()
 
+            # A variant listed twice (e.g. with different discounts) becomes
+            # one movement and one FM/Shopify round trip for its total.
+            qty_by_sku: Counter = Counter()
+            title_by_sku: Dict[str, str] = {}
+            # Loop invariants bound once; the loops below run per line item
+            log_warning = self.logger.warning
+            set_title = title_by_sku.setdefault
             for item in line_items:
-                sku = item.get("sku")
-                quantity_sold = item.get("quantity", 0)
-                title = item.get("title", "?")
+                get = item.get
+                sku = get("sku")
+                quantity_sold = get("quantity", 0)
+                title = get("title", "?")
 
                 if not sku:
-                    self.logger.warning(
-                        f"Line item '{title}' has no SKU in order {order_name} — skipping"
+                    log_warning(
+                        "Line item '%s' has no SKU — skipping", title
                     )
                     continue
 
                 if quantity_sold <= 0:
-                    self.logger.warning(
-                        f"Skipping {sku}: invalid quantity {quantity_sold} in order {order_name}"
+                    log_warning(
+                        "Skipping %s: invalid quantity %s", sku, quantity_sold
                     )
                     continue
 
-                try:
-                    self._process_line_item(sku, quantity_sold, order_name, title)
-                    result["items_processed"] += 1
-                except Exception as e:
-                    error_msg = (
-                        f"Failed processing SKU {sku} ({title}) "
-                        f"in order {order_name}: {str(e)}"
-                    )
-                    self.logger.error(error_msg)
-                    self.error_logger.error(error_msg)
-                    result["errors"].append({"sku": sku, "title": title, "error": str(e)})
+                qty_by_sku[sku] += quantity_sold
+                set_title(sku, title)
+
+            self.logger.info(
+                "%d line item(s) → %d distinct SKU(s) to process",
+                len(line_items), len(qty_by_sku)
+            )
+
+            valid_items = [
+                (sku, quantity_sold, title_by_sku[sku])
+                for sku, quantity_sold in qty_by_sku.items()
+            ]
+            outcomes = asyncio.run(self._process_all_items_async(valid_items))
+            log_error = self.logger.error
+            error_log = self.error_logger.error
+            add_error = result["errors"].append
+            processed = 0
+            for sku, title, error in outcomes:
+                if error is None:
+                    processed += 1
+                    continue
+                log_args = (sku, title, error)
+                log_error("Failed processing SKU %s (%s): %s", *log_args)
+                error_log("Failed processing SKU %s (%s): %s", *log_args)
+                add_error(LineItemError(sku, str(error), title))
+            result["items_processed"] = processed
 
             result["success"] = len(result["errors"]) == 0
 
             if result["success"]:
                 self.logger.info(
-                    f"Order {order_name} fully processed — "
-                    f"{result['items_processed']} item(s) updated"
+                    "Order %s fully processed — %d item(s) updated",
+                    order_name, result["items_processed"]
                 )
             else:
                 self.logger.warning(
-                    f"Order {order_name} processed with {len(result['errors'])} error(s)"
+                    "Order %s processed with %d error(s)", order_name, len(result["errors"])
                 )
 
         except Exception as e:
             self.logger.error(
-                f"Unexpected error processing order webhook: {str(e)}",
+                "Unexpected error processing order webhook: %s", e,
                 exc_info=True,
             )
             result["success"] = False
-            result["errors"].append({"error": str(e), "type": type(e).__name__})
+            result["errors"].append(LineItemError(None, str(e), error_type=type(e).__name__))
+        finally:
+            reset_log_context(log_context)
 
         return result
 
-    def _process_line_item(
-        self, sku: str, quantity_sold: int, order_name: str, title: str
+    async def _process_all_items_async(
+        self, items: List[Tuple[str, int, str]]
+    ) -> List[Tuple[str, str, Optional[Exception]]]:
+        """
+        Run the 4-step flow for every SKU of an order.
+
+        Steps 1-2 (movement + recalc) are per-SKU FileMaker calls and run
+        concurrently, bounded by ``LINE_ITEM_CONCURRENCY``.  Steps 3-4 are
+        batched: one FM ``_find`` for every recalculated SKU, then one
+        Shopify ``inventorySetQuantities`` mutation.
+
+        Args:
+            items: ``(sku, quantity_sold, title)`` tuples, one per distinct SKU.
+
+        Returns:
+            One ``(sku, title, exception or None)`` per SKU.
+        """
+        if not items:
+            return []
+
+        title_by_sku = {sku: title for sku, _, title in items}
+        errors: Dict[str, Exception] = {}
+        sem = asyncio.Semaphore(LINE_ITEM_CONCURRENCY)
+        auth_lock = asyncio.Lock()
+
+        async with self.fm.async_client(LINE_ITEM_CONCURRENCY) as fm_client, \
+                self.shopify.async_client() as shopify_client:
+
+            # ── Steps 1-2: movement + recalc, per SKU ─────────────────
+            async def record_sale(sku: str, quantity_sold: int, title: str):
+                async with sem:
+                    try:
+                        await self._record_sale(
+                            sku, quantity_sold, title, fm_client, auth_lock
+                        )
+                    except _ITEM_ERRORS as e:
+                        errors[sku] = e
+
+            await asyncio.gather(
+                *(record_sale(sku, quantity_sold, title) for sku, quantity_sold, title in items)
+            )
+            recalculated = [sku for sku, _, _ in items if sku not in errors]
+
+            # ── Step 3: one FM find for every recalculated SKU ────────
+            stock: Dict[str, int] = {}
+            if recalculated:
+                self.logger.info(
+                    "Step 3/4: Fetching updated stock for %d SKU(s) from FM", len(recalculated)
+                )
+                try:
+                    stock = await self.fm.aget_stocks(recalculated, fm_client, auth_lock)
+                except _ITEM_ERRORS as e:
+                    errors.update((sku, e) for sku in recalculated)
+                for sku in recalculated:
+                    if sku not in stock and sku not in errors:
+                        errors[sku] = FileMakerAPIError(f"Product not found in FM for SKU {sku}")
+
+            # ── Step 4: one Shopify mutation for every fetched SKU ────
+            # Shopify is only consulted once the sales are recorded in FM,
+            # so a Shopify outage or 429 can never lose a stock decrement.
+            # One GraphQL search resolves every inventory item ID; the
+            # per-SKU REST path would page the whole catalog on a cold cache.
+            found: Dict[str, StockItem] = {}
+            inventory_ids: Dict[str, Optional[str]] = {}
+            fetched = [sku for sku in recalculated if sku in stock]
+            if fetched:
+                try:
+                    found = await asyncio.to_thread(self.shopify.get_inventory_by_skus, fetched)
+                    inventory_ids = {
+                        sku: item.metadata.get("inventory_item_id") for sku, item in found.items()
+                    }
+                except _ITEM_ERRORS as e:
+                    self.logger.warning(
+                        "Bulk inventory ID lookup failed (%s); resolving per SKU", e
+                    )
+
+            updates = [
+                StockUpdate(
+                    sku,
+                    stock[sku],
+                    found[sku].quantity if sku in found else 0,
+                    title_by_sku[sku],
+                    inventory_ids.get(sku),
+                )
+                for sku in recalculated
+                if sku in stock
+            ]
+            if updates:
+                self.logger.info("Step 4/4: Updating Shopify inventory for %d SKU(s)", len(updates))
+                await self._push_updates(updates, shopify_client, errors)
+
+        for update in updates:
+            if update.sku not in errors:
+                self.logger.info(
+                    "  [%s] ✓ Complete — %s: Shopify stock set to %s",
+                    update.sku, update.name, update.quantity
+                )
+
+        return [(sku, title, errors.get(sku)) for sku, _, title in items]
+
+    async def _record_sale(
+        self,
+        sku: str,
+        quantity_sold: int,
+        title: str,
+        fm_client: httpx.AsyncClient,
+        auth_lock: asyncio.Lock,
     ) -> None:
         """
-        Process a single line item through the 4-step webhook flow.
+        Steps 1-2 of the webhook flow for one SKU: record the sale in FM and
+        recalculate its stock.  The two calls are causally dependent and run
+        in sequence.
 
         Args:
             sku: Product SKU (Conceptos Cobro_pk).
             quantity_sold: How many units were sold.
-            order_name: Shopify order name (for logging).
             title: Product title (for logging).
+            fm_client: Client from ``FileMakerClient.async_client``.
+            auth_lock: FM re-authentication lock shared with ``fm_client``.
         """
         self.logger.info(
-            f"  [{sku}] {title} — qty sold: {quantity_sold} (order {order_name})"
+            "  [%s] %s — qty sold: %s", sku, title, quantity_sold
         )
 
         # Step 1: Create movement record in FM
-        self.logger.info(f"  [{sku}] Step 1/4: Creating movement record (salida: {quantity_sold})")
-        self.fm.create_movement(sku, quantity_out=quantity_sold)
+        self.logger.info("  [%s] Step 1/4: Creating movement record (salida: %s)", sku, quantity_sold)
+        await self.fm.acreate_movement(sku, quantity_sold, fm_client, auth_lock)
 
         # Step 2: Run recalculation script
-        self.logger.info(f"  [{sku}] Step 2/4: Running ActualizarStock_dapi")
-        self.fm.recalculate_stock(sku)
+        self.logger.info("  [%s] Step 2/4: Running ActualizarStock_dapi", sku)
+        await self.fm.arecalculate_stock(sku, fm_client, auth_lock)
 
-        # Step 3: Fetch updated stock from FM
-        self.logger.info(f"  [{sku}] Step 3/4: Fetching updated stock from FM")
-        new_quantity = self.fm.get_stock(sku)
-        self.logger.info(f"  [{sku}] FM Inventario = {new_quantity}")
+    async def _push_updates(
+        self,
+        updates: List[StockUpdate],
+        shopify_client: httpx.AsyncClient,
+        errors: Dict[str, Exception],
+    ) -> None:
+        """
+        Set Shopify inventory for ``updates`` with one bulk mutation, falling
+        back to concurrent per-SKU calls if the mutation is refused.
 
-        # Step 4: Update Shopify inventory
-        self.logger.info(f"  [{sku}] Step 4/4: Updating Shopify inventory → {new_quantity}")
-        self.shopify.update_inventory(sku, new_quantity)
+        Failures are added to ``errors`` keyed by SKU; nothing is raised,
+        since the sales are already recorded in FM by the time this runs.
+        """
+        try:
+            failures = await asyncio.to_thread(self.shopify.update_inventory_bulk, updates)
+        except _ITEM_ERRORS as e:
+            self.logger.warning("Bulk inventory update refused (%s); updating per SKU", e)
+        else:
+            for failure in failures:
+                errors[failure["sku"]] = ShopifyAPIError(failure["error"])
+            return
+
+        sem = asyncio.Semaphore(LINE_ITEM_CONCURRENCY)
+
+        async def push_one(update: StockUpdate):
+            async with sem:
+                try:
+                    await self.shopify.aupdate_inventory(
+                        update.sku, update.quantity, shopify_client, update.inventory_item_id
+                    )
+                except _ITEM_ERRORS as e:
+                    errors[update.sku] = e
 
-        self.logger.info(
-            f"  [{sku}] ✓ Complete — {title}: Shopify stock set to {new_quantity}"
-        )
+        await asyncio.gather(*(push_one(update) for update in updates))
 
     # ------------------------------------------------------------------
     # Refund / return processing
@@ -161,7 +369,9 @@ class ShopifySyncService:
         """
         Process a Shopify refund webhook and restock items in FileMaker.
 
-        For each refund_line_item with restock_type 'return' or 'cancel':
+        Refund line items with restock_type 'return' or 'cancel' are merged
+        by SKU (quantities summed), then for each SKU — concurrently, up to
+        ``LINE_ITEM_CONCURRENCY`` at a time:
           1. create_entry_movement(sku, quantity)
           2. recalculate_stock(sku)
           3. get_stock(sku) → new_quantity
@@ -171,7 +381,8 @@ class ShopifySyncService:
             webhook_data: Parsed JSON body from the Shopify refund webhook.
 
         Returns:
-            Dict with success flag, counts, and any per-item errors.
+            Dict with success flag, counts, and any per-item errors
+            (``LineItemError`` records).
         """
         result: Dict[str, Any] = {
             "success": True,
@@ -182,6 +393,7 @@ class ShopifySyncService:
             "errors": [],
         }
 
+        self.shopify.invalidate_cache()
         try:
             refund_id = webhook_data.get("id")
             order_id = webhook_data.get("order_id")
@@ -189,21 +401,24 @@ class ShopifySyncService:
             result["order_id"] = order_id
 
             self.logger.info(
-                f"Processing refund webhook: refund {refund_id} for order {order_id}"
+                "Processing refund webhook: refund %s for order %s", refund_id, order_id
             )
 
             refund_line_items = webhook_data.get("refund_line_items", [])
             if not refund_line_items:
-                self.logger.warning(f"No refund line items in refund {refund_id}")
+                self.logger.warning("No refund line items in refund %s", refund_id)
                 return result
 
             self.logger.info(
-                f"Found {len(refund_line_items)} refund line items in refund {refund_id}"
+                "Found %d refund line items in refund %s", len(refund_line_items), refund_id
             )
 
             # Authenticate FM once for the whole refund
             self.fm.authenticate()
 
+            # SKU → [quantity, restock_type, title]; one restock per SKU also
+            # keeps two workers from recalculating the same product at once.
+            pending: Dict[str, List[Any]] = {}
             for item in refund_line_items:
                 restock_type = item.get("restock_type", "no_restock")
                 quantity = item.get("quantity", 0)
@@ -214,57 +429,73 @@ class ShopifySyncService:
                 # Only restock if items are actually being returned/cancelled
                 if restock_type == "no_restock":
                     self.logger.info(
-                        f"  Skipping {title} (SKU: {sku}) — restock_type=no_restock"
+                        "  Skipping %s (SKU: %s) — restock_type=no_restock", title, sku
                     )
                     result["items_skipped"] += 1
                     continue
 
                 if not sku:
                     self.logger.warning(
-                        f"  Refund line item '{title}' has no SKU — skipping"
+                        "  Refund line item '%s' has no SKU — skipping", title
                     )
                     continue
 
                 if quantity <= 0:
                     self.logger.warning(
-                        f"  Skipping {sku}: invalid quantity {quantity}"
+                        "  Skipping %s: invalid quantity %s", sku, quantity
                     )
                     continue
 
-                try:
-                    self._process_refund_line_item(
-                        sku, quantity, restock_type, refund_id, title
-                    )
-                    result["items_processed"] += 1
-                except Exception as e:
-                    error_msg = (
-                        f"Failed restocking SKU {sku} ({title}) "
-                        f"in refund {refund_id}: {str(e)}"
-                    )
-                    self.logger.error(error_msg)
-                    self.error_logger.error(error_msg)
-                    result["errors"].append({"sku": sku, "title": title, "error": str(e)})
+                if sku in pending:
+                    pending[sku][0] += quantity
+                else:
+                    pending[sku] = [quantity, restock_type, title]
+
+            if pending:
+                # Each SKU's restock is independent, network-bound FM/Shopify
+                # I/O on thread-safe clients.
+                with ThreadPoolExecutor(
+                    max_workers=min(LINE_ITEM_CONCURRENCY, len(pending)),
+                    thread_name_prefix="refund-item",
+                ) as pool:
+                    futures = {
+                        pool.submit(
+                            self._process_refund_line_item,
+                            sku, quantity, restock_type, refund_id, title
+                        ): sku
+                        for sku, (quantity, restock_type, title) in pending.items()
+                    }
+                    for future in as_completed(futures):
+                        sku = futures[future]
+                        try:
+                            future.result()
+                            result["items_processed"] += 1
+                        except _ITEM_ERRORS as e:
+                            title = pending[sku][2]
+                            log_args = (sku, title, refund_id, e)
+                            self.logger.error("Failed restocking SKU %s (%s) in refund %s: %s", *log_args)
+                            self.error_logger.error("Failed restocking SKU %s (%s) in refund %s: %s", *log_args)
+                            result["errors"].append(LineItemError(sku, str(e), title))
 
             result["success"] = len(result["errors"]) == 0
 
             if result["success"]:
                 self.logger.info(
-                    f"Refund {refund_id} fully processed — "
-                    f"{result['items_processed']} item(s) restocked, "
-                    f"{result['items_skipped']} skipped"
+                    "Refund %s fully processed — %d item(s) restocked, %d skipped",
+                    refund_id, result["items_processed"], result["items_skipped"]
                 )
             else:
                 self.logger.warning(
-                    f"Refund {refund_id} processed with {len(result['errors'])} error(s)"
+                    "Refund %s processed with %d error(s)", refund_id, len(result["errors"])
                 )
 
         except Exception as e:
             self.logger.error(
-                f"Unexpected error processing refund webhook: {str(e)}",
+                "Unexpected error processing refund webhook: %s", e,
                 exc_info=True,
             )
             result["success"] = False
-            result["errors"].append({"error": str(e), "type": type(e).__name__})
+            result["errors"].append(LineItemError(None, str(e), error_type=type(e).__name__))
 
         return result
 
@@ -287,29 +518,29 @@ class ShopifySyncService:
             title: Product title (for logging).
         """
         self.logger.info(
-            f"  [{sku}] {title} — restocking {quantity} unit(s) "
-            f"(type: {restock_type}, refund {refund_id})"
+            "  [%s] %s — restocking %s unit(s) (type: %s, refund %s)",
+            sku, title, quantity, restock_type, refund_id
         )
 
         # Step 1: Create entry movement record in FM
-        self.logger.info(f"  [{sku}] Step 1/4: Creating entry movement (entrada: {quantity})")
+        self.logger.info("  [%s] Step 1/4: Creating entry movement (entrada: %s)", sku, quantity)
         self.fm.create_entry_movement(sku, quantity_in=quantity)
 
         # Step 2: Run recalculation script
-        self.logger.info(f"  [{sku}] Step 2/4: Running ActualizarStock_dapi")
+        self.logger.info("  [%s] Step 2/4: Running ActualizarStock_dapi", sku)
         self.fm.recalculate_stock(sku)
 
         # Step 3: Fetch updated stock from FM
-        self.logger.info(f"  [{sku}] Step 3/4: Fetching updated stock from FM")
+        self.logger.info("  [%s] Step 3/4: Fetching updated stock from FM", sku)
         new_quantity = self.fm.get_stock(sku)
-        self.logger.info(f"  [{sku}] FM Inventario = {new_quantity}")
+        self.logger.info("  [%s] FM Inventario = %s", sku, new_quantity)
 
         # Step 4: Update Shopify inventory
-        self.logger.info(f"  [{sku}] Step 4/4: Updating Shopify inventory → {new_quantity}")
+        self.logger.info("  [%s] Step 4/4: Updating Shopify inventory → %s", sku, new_quantity)
         self.shopify.update_inventory(sku, new_quantity)
 
         self.logger.info(
-            f"  [{sku}] ✓ Restocked — {title}: Shopify stock set to {new_quantity}"
+            "  [%s] ✓ Restocked — %s: Shopify stock set to %s", sku, title, new_quantity
         )
 
     # ------------------------------------------------------------------
@@ -317,7 +548,7 @@ class ShopifySyncService:
     # ------------------------------------------------------------------
 
     def close(self):
-        self.fm.close()
+        # ``self.fm`` is shared across instances; see ``close_shared_client``
         self.shopify.close()
 
     def __enter__(self):
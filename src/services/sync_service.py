@@ -1,12 +1,23 @@
 """Main synchronization service orchestrator."""
 
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
+
+import httpx
 
 from .filemaker_sync import FileMakerSyncService
 from .shopify_sync import ShopifySyncService
+from ..api.filemaker_client import FileMakerClient
+from ..api.shopify_client import ShopifyClient
 from ..models.sync_result import SyncResult
 from ..utils.logger import get_sync_logger, get_error_logger
 from ..utils.config import get_config
+from ..utils.exceptions import BaseAppException
+
+
+# Expected failures from the FM/Shopify calls of an on-demand sync
+_SKU_ERRORS = (BaseAppException, httpx.HTTPError)
 
 
 class SyncService:
@@ -19,8 +30,23 @@ class SyncService:
         self.config = get_config()
         self.logger = get_sync_logger()
         self.error_logger = get_error_logger()
-
-    def execute_nightly_sync(self) -> SyncResult:
+        self._filemaker_sync: Optional[FileMakerSyncService] = None
+
+    def _get_filemaker_sync(self) -> FileMakerSyncService:
+        """Return the FM → Shopify sync service, reused across nightly runs."""
+        if self._filemaker_sync is None:
+            self._filemaker_sync = FileMakerSyncService()
+        return self._filemaker_sync
+
+    def close(self):
+        """Release the API clients' connection pools."""
+        if self._filemaker_sync is not None:
+            self._filemaker_sync.close()
+            self._filemaker_sync = None
+
+    def execute_nightly_sync(
+        self, full_resync: bool = False, stop_event: Optional[threading.Event] = None
+    ) -> SyncResult:
         """
         Execute the full nightly FM → Shopify sync.
 
@@ -29,23 +55,30 @@ class SyncService:
           2. Recalculates each product's stock in FM
           3. Re-fetches updated stock values
           4. Updates Shopify inventory
+
+        Args:
+            full_resync: Compare every SKU against Shopify, even those
+                unchanged in FM since the last sync.
+            stop_event: When set, the running sync stops early with a
+                partial result.
         """
         self.logger.info("=" * 60)
         self.logger.info("Starting Nightly FM → Shopify Sync")
         self.logger.info("=" * 60)
 
         try:
-            with FileMakerSyncService() as sync_service:
-                result = sync_service.nightly_sync()
+            result = self._get_filemaker_sync().nightly_sync(
+                full_resync=full_resync, stop_event=stop_event
+            )
 
-                if result.errors:
-                    for error in result.errors:
-                        self.error_logger.error(
-                            f"Sync error for {error.sku}: {error.message}",
-                            extra={"details": error.details}
-                        )
+            if result.errors:
+                for error in result.errors:
+                    self.error_logger.error(
+                        f"Sync error for {error.sku}: {error.message}",
+                        extra={"details": error.details}
+                    )
 
-                return result
+            return result
 
         except Exception as e:
             self.error_logger.error(f"Critical nightly sync error: {str(e)}", exc_info=True)
@@ -54,39 +87,147 @@ class SyncService:
             result.finalize()
             return result
 
+    def execute_filemaker_to_shopify_sync(
+        self, dry_run: bool = False, full_resync: bool = False
+    ) -> SyncResult:
+        """
+        Run the FM → Shopify sync on demand (the ``sync`` CLI command).
+
+        Args:
+            dry_run: Only compare FM's current Inventario with Shopify and
+                report what would change; nothing is recalculated in FM or
+                written to Shopify.
+            full_resync: Compare every SKU against Shopify, even those
+                unchanged in FM since the last sync.
+        """
+        if not dry_run:
+            return self.execute_nightly_sync(full_resync=full_resync)
+
+        self.logger.info("Starting FM → Shopify sync (dry run)")
+        result = SyncResult(success=True, metadata={"dry_run": True})
+        filemaker_sync = self._get_filemaker_sync()
+
+        try:
+            fm_stock = {
+                item.sku: item
+                for item in filemaker_sync.filemaker_client.iter_all_stock()
+            }
+            result.total_items = len(fm_stock)
+
+            shopify_client = filemaker_sync.shopify_client
+            shopify_client.invalidate_cache()
+            shopify_stock = shopify_client.get_inventory_by_skus(list(fm_stock))
+
+            for sku, item in fm_stock.items():
+                current = shopify_stock.get(sku)
+                if current is None:
+                    result.add_error(sku, "SKUNotFoundError", f"Not in Shopify: {sku}")
+                elif current.quantity != item.quantity:
+                    self.logger.info(
+                        "  Would update %s: Shopify %d → %d", sku, current.quantity, item.quantity
+                    )
+                    result.updated_count += 1
+                else:
+                    result.skipped_count += 1
+
+        except _SKU_ERRORS as e:
+            self.error_logger.error("Dry-run sync failed: %s", e, exc_info=True)
+            result.add_error("SYSTEM", type(e).__name__, str(e))
+
+        result.success = not result.errors
+        result.finalize()
+        return result
+
+    def execute_single_sku_sync(self, sku: str, dry_run: bool = False) -> SyncResult:
+        """
+        Sync one product: recalculate it in FM, then push its stock to Shopify.
+
+        Args:
+            sku: Product SKU (Conceptos Cobro_pk).
+            dry_run: Read FM's current Inventario and report the change
+                without recalculating it or writing to Shopify.
+        """
+        self.logger.info("Syncing single SKU %s%s", sku, " (dry run)" if dry_run else "")
+        result = SyncResult(success=True, total_items=1, metadata={"dry_run": dry_run})
+        filemaker_sync = self._get_filemaker_sync()
+        fm = filemaker_sync.filemaker_client
+        shopify_client = filemaker_sync.shopify_client
+
+        try:
+            if not dry_run:
+                fm.recalculate_stock(sku)
+            quantity = fm.get_stock(sku)
+
+            shopify_client.invalidate_cache()
+            current = shopify_client.get_inventory_by_sku(sku)
+            if current is None:
+                result.add_error(sku, "SKUNotFoundError", f"Not in Shopify: {sku}")
+            elif current.quantity == quantity:
+                result.skipped_count = 1
+            else:
+                if not dry_run:
+                    shopify_client.update_inventory(sku, quantity)
+                self.logger.info(
+                    "  %s %s: Shopify %d → %d",
+                    "Would update" if dry_run else "Updated", sku, current.quantity, quantity
+                )
+                result.updated_count = 1
+
+        except _SKU_ERRORS as e:
+            self.error_logger.error("Sync failed for %s: %s", sku, e)
+            result.add_error(sku, type(e).__name__, str(e))
+
+        result.success = not result.errors
+        result.finalize()
+        return result
+
     def test_connections(self) -> dict:
-        """Test connectivity to FileMaker and Shopify APIs."""
+        """Test connectivity to FileMaker and Shopify APIs (both at once)."""
         self.logger.info("Testing API connections...")
 
-        results = {
-            "filemaker": {"success": False, "error": None},
-            "shopify": {"success": False, "error": None}
-        }
+        results = {}
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="conn-test") as executor:
+            futures = [executor.submit(self._test_filemaker), executor.submit(self._test_shopify)]
+            for future in as_completed(futures):
+                key, outcome = future.result()
+                results[key] = outcome
 
-        # Test FileMaker
+        return {"filemaker": results["filemaker"], "shopify": results["shopify"]}
+
+    def _test_filemaker(self) -> Tuple[str, dict]:
+        """Authenticate against FileMaker; returns ``("filemaker", outcome)``."""
+        outcome = {"success": False, "error": None}
         try:
-            from ..api.filemaker_client import FileMakerClient
             with FileMakerClient() as client:
                 client.authenticate()
-                results["filemaker"]["success"] = True
+                outcome["success"] = True
                 self.logger.info("✓ FileMaker connection successful")
         except Exception as e:
-            results["filemaker"]["error"] = str(e)
+            outcome["error"] = str(e)
             self.logger.error(f"✗ FileMaker connection failed: {str(e)}")
+        return "filemaker", outcome
 
-        # Test Shopify
+    def _test_shopify(self) -> Tuple[str, dict]:
+        """Run one inventory search on Shopify; returns ``("shopify", outcome)``."""
+        outcome = {"success": False, "error": None}
         try:
-            from ..api.shopify_client import ShopifyClient
             with ShopifyClient() as client:
-                client.get_inventory_by_sku("TEST-CONNECTION-SKU")
-                results["shopify"]["success"] = True
+                # One GraphQL search; the REST lookup would page the whole
+                # catalog to build its SKU cache first.
+                client.get_inventory_by_skus(["TEST-CONNECTION-SKU"])
+                outcome["success"] = True
                 self.logger.info("✓ Shopify connection successful")
         except Exception as e:
             if "not found" in str(e).lower() or "404" in str(e):
-                results["shopify"]["success"] = True
+                outcome["success"] = True
                 self.logger.info("✓ Shopify connection successful")
             else:
-                results["shopify"]["error"] = str(e)
+                outcome["error"] = str(e)
                 self.logger.error(f"✗ Shopify connection failed: {str(e)}")
+        return "shopify", outcome
+
+    def __enter__(self):
+        return self
 
-        return results
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,153 @@
+"""Batch inbound order webhooks into one FileMaker/Shopify pass.
+
+Webhook requests only enqueue the parsed order and return.  A single
+worker thread collects whatever arrives within ``batch_window`` seconds
+(up to ``batch_max_orders``), merges the line items and hands them to
+``ShopifySyncService.process_order_webhook`` as one order.  That call
+already sums quantities per SKU, so a burst of orders for the same
+product costs one movement, one recalculation, one stock fetch and one
+Shopify mutation instead of one of each per order.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .shopify_sync import ShopifySyncService
+from ..utils.config import get_config
+from ..utils.dedup import RecentKeys
+from ..utils.logger import get_webhook_logger
+
+
+class WebhookBatcher:
+    """Bounded order queue drained in time-boxed batches by one thread."""
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        window: Optional[float] = None,
+        max_orders: Optional[int] = None,
+    ):
+        wc = get_config().webhook
+        self.window = wc.batch_window if window is None else window
+        self.max_orders = wc.batch_max_orders if max_orders is None else max_orders
+        self.logger = get_webhook_logger()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(
+            maxsize=wc.queue_size if maxsize is None else maxsize
+        )
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sync_service: Optional[ShopifySyncService] = None
+        self._processed: Optional[RecentKeys] = None
+
+    def put(self, webhook_data: Dict[str, Any]) -> bool:
+        """Queue an order for the next batch.
+
+        Returns:
+            False if the queue is full (caller should ask Shopify to retry).
+        """
+        try:
+            self._queue.put_nowait(webhook_data)
+        except queue.Full:
+            return False
+        return True
+
+    def start(
+        self,
+        sync_service: ShopifySyncService,
+        processed: Optional[RecentKeys] = None,
+    ):
+        """Start the worker thread.
+
+        Args:
+            sync_service: Long-lived service every batch is processed with.
+            processed: Idempotency set the webhook handler marks order IDs
+                in; IDs of a batch that fails as a whole are removed from
+                it so Shopify's retries are processed instead of dropped.
+        """
+        self._sync_service = sync_service
+        self._processed = processed
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="webhook-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker after it flushes every order already queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        """Wait for one order, then gather more until the window closes."""
+        get = self._queue.get
+        try:
+            batch = [get(timeout=self.window)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_orders:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        """Process ``batch`` as a single merged order."""
+        names = [order.get("name") or str(order.get("id")) for order in batch]
+        merged = {
+            "id": None,
+            "name": ", ".join(names),
+            "line_items": [
+                item for order in batch for item in order.get("line_items", [])
+            ],
+        }
+        self.logger.info("Processing batch of %d order(s): %s", len(batch), merged["name"])
+
+        try:
+            result = self._sync_service.process_order_webhook(merged)
+        except Exception as e:
+            self.logger.error("Batch processing failed: %s", e, exc_info=True)
+            self._forget(batch)
+            return
+
+        # An error without a SKU means the batch failed as a whole (e.g. FM
+        # authentication) rather than item by item
+        if any(error.sku is None for error in result["errors"]):
+            self._forget(batch)
+
+        if result["success"]:
+            self.logger.info(
+                "Batch of %d order(s) completed: %d items updated",
+                len(batch), result["items_processed"]
+            )
+        else:
+            self.logger.warning(
+                "Batch of %d order(s) completed with %d error(s)",
+                len(batch), len(result["errors"])
+            )
+
+    def _forget(self, batch: List[Dict[str, Any]]):
+        """Un-mark ``batch``'s orders as processed so Shopify's retries get through."""
+        if self._processed is None:
+            return
+        for order in batch:
+            self._processed.discard(order.get("id"))
+        self.logger.warning(
+            "Batch of %d order(s) failed; their webhook retries will be accepted",
+            len(batch)
+        )
@@ -1,12 +1,12 @@
 """Configuration management using pydantic-settings."""
 
 import os
-from functools import lru_cache
+import threading
 from pathlib import Path
 from typing import Optional
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,6 +16,8 @@ class APIConfig(BaseModel):
     max_retries: int = 3
     retry_delay: int = 1
     exponential_backoff: bool = True
+    max_connections: int = 20
+    max_keepalive_connections: int = 20
 
 
 class SyncConfig(BaseModel):
@@ -23,6 +25,8 @@ class SyncConfig(BaseModel):
     batch_size: int = 100
     enable_diff_check: bool = True
     parallel_processing: bool = False
+    # Relative paths are resolved against the project root, not the cwd
+    shadow_file: str = ".sync_shadow.json"
 
 
 class ShopifyConfig(BaseModel):
@@ -36,6 +40,8 @@ class FileMakerConfig(BaseModel):
     """FileMaker-specific configuration."""
     session_timeout: int = 900
     auto_refresh_token: bool = True
+    requests_per_second: float = 10.0
+    request_burst: int = 10
 
 
 class LoggingFilesConfig(BaseModel):
@@ -58,6 +64,11 @@ class WebhookConfig(BaseModel):
     """Webhook configuration."""
     validate_signature: bool = True
     request_timeout: int = 30
+    queue_size: int = 1000  # orders waiting to be batched; beyond this → 503
+    batch_window: float = 0.5  # seconds to collect orders into one batch
+    batch_max_orders: int = 50
+    refund_queue_size: int = 50  # refunds waiting for a worker; beyond this → 503
+    refund_workers: int = 4
 
 
 class SchedulerConfig(BaseModel):
@@ -70,6 +81,9 @@ class SchedulerConfig(BaseModel):
     # Nightly sync schedule — easy to modify for testing
     nightly_sync_hour: int = 22
     nightly_sync_minute: int = 0
+    # Weekday (0 = Monday) whose nightly sync ignores the shadow file and
+    # compares every SKU with Shopify; None disables the weekly full pass.
+    full_resync_weekday: Optional[int] = Field(default=6, ge=0, le=6)
 
 
 class YAMLConfig(BaseModel):
@@ -103,6 +117,29 @@ class Settings(BaseSettings):
     log_level: Optional[str] = Field(default=None, description="Override log level")
     sync_interval_minutes: int = Field(default=60, description="Sync interval in minutes")
     port: int = Field(default=8000, description="Server port")
+    embed_scheduler: bool = Field(
+        default=True,
+        description="Run the nightly scheduler inside the web process "
+                    "(disable when a separate worker process runs it)",
+    )
+    workers: int = Field(
+        default=1,
+        description="Uvicorn worker processes for the web server.  Webhook "
+                    "idempotency and order batching are per process, so a "
+                    "Shopify retry that lands on another worker is not "
+                    "recognised as a duplicate",
+    )
+
+    @model_validator(mode="after")
+    def _single_embedded_scheduler(self) -> "Settings":
+        # Every worker runs the lifespan, so each would start its own
+        # nightly sync.
+        if self.workers > 1 and self.embed_scheduler:
+            raise ValueError(
+                "WORKERS > 1 requires EMBED_SCHEDULER=false "
+                "(run the nightly sync in the worker process instead)"
+            )
+        return self
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -112,6 +149,13 @@ class Settings(BaseSettings):
     )
 
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CONFIG_PATH = PROJECT_ROOT / "config" / "config.yml"
+
+# libyaml-backed safe loader when PyYAML was built with it
+_YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 class AppConfig:
     """Combined application configuration."""
 
@@ -119,11 +163,8 @@ class AppConfig:
         self.env = Settings()
 
         # Load YAML config
-        config_path = Path(__file__).parent.parent.parent / "config" / "config.yml"
-        if config_path.exists():
-            with open(config_path, "r") as f:
-                yaml_data = yaml.safe_load(f)
-                self.yaml = YAMLConfig(**yaml_data)
+        if CONFIG_PATH.exists():
+            self.yaml = _load_yaml_config()
         else:
             self.yaml = YAMLConfig()
 
@@ -164,7 +205,28 @@ class AppConfig:
         return self.env.environment.lower() == "production"
 
 
-@lru_cache()
+def _load_yaml_config() -> YAMLConfig:
+    """Parse and validate config.yml."""
+    with open(CONFIG_PATH, "r") as f:
+        yaml_data = yaml.load(f, Loader=_YAMLLoader)
+    return YAMLConfig(**yaml_data)
+
+
+_config: Optional[AppConfig] = None
+_config_lock = threading.Lock()
+
+
 def get_config() -> AppConfig:
-    """Get cached configuration instance."""
-    return AppConfig()
+    """Get the process-wide configuration instance, built on first use.
+
+    The lock makes concurrent first callers (scheduler thread, webhook
+    handlers) share one ``AppConfig`` instead of each parsing the YAML.
+    """
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = AppConfig()
+            config = _config
+    return config
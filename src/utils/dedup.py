@@ -0,0 +1,54 @@
+"""Bounded, expiring set of recently seen keys for webhook idempotency."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class RecentKeys:
+    """Thread-safe set that forgets keys after ``ttl`` seconds.
+
+    Insertion order doubles as expiry order (every key gets the same TTL),
+    so expired keys are always at the front and are dropped with
+    ``popitem(last=False)``.  ``maxsize`` caps memory during bursts.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 86_400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._expires: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable) -> bool:
+        """Record ``key``.
+
+        Returns:
+            True if the key is new (or had expired), False if it was seen
+            within the last ``ttl`` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires = self._expires
+            while expires:
+                oldest_key, oldest_expiry = next(iter(expires.items()))
+                if oldest_expiry > now:
+                    break
+                del expires[oldest_key]
+
+            if key in expires:
+                return False
+
+            expires[key] = now + self.ttl
+            while len(expires) > self.maxsize:
+                expires.popitem(last=False)
+            return True
+
+    def discard(self, key: Hashable) -> None:
+        """Forget ``key`` so a later ``add`` treats it as new."""
+        with self._lock:
+            self._expires.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._expires)
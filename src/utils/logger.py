@@ -1,14 +1,94 @@
 """Logging configuration for the application."""
 
+import atexit
+import functools
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from contextvars import ContextVar, Token
+from logging.handlers import (
+    MemoryHandler,
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+)
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from .config import get_config
+from .config import LoggingFilesConfig, get_config
 
+# Records buffered before the file handler writes them out
+FILE_LOG_BUFFER = 256
 
+# ``config.logging.files``, bound on first use rather than at import so
+# importing this module never requires the environment settings.
+_log_files: Optional[LoggingFilesConfig] = None
+
+
+def _files() -> LoggingFilesConfig:
+    global _log_files
+    if _log_files is None:
+        _log_files = get_config().logging.files
+    return _log_files
+
+
+# Label of the unit of work being logged (e.g. "order #1001").  Read in the
+# logging thread by ``_ContextFilter`` and prefixed to the message by
+# ``_ContextFormatter`` on the listener thread, so call sites need not
+# repeat it.  Asyncio tasks and ``to_thread`` calls inherit it.
+_log_context: ContextVar[str] = ContextVar("log_context", default="")
+
+
+def set_log_context(label: str) -> Token:
+    """Prefix log messages from this context with ``[label]``.
+
+    Returns:
+        Token to pass to :func:`reset_log_context`.
+    """
+    return _log_context.set(label)
+
+
+def reset_log_context(token: Token) -> None:
+    """Restore the log context that was active before ``set_log_context``."""
+    _log_context.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    """Capture the caller's log context on the record before it is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.log_context = _log_context.get()
+        return True
+
+
+class _ContextFormatter(logging.Formatter):
+    """Prefix the message with the captured log context, if any."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        context = getattr(record, "log_context", "")
+        if context:
+            record.message = f"[{context}] {record.message}"
+        return super().formatMessage(record)
+
+
+# One listener thread per configured logger writes its records; callers
+# only enqueue.  Stopped (and drained) at interpreter exit.
+_listeners: List[QueueListener] = []
+_listeners_lock = threading.Lock()
+
+
+def stop_log_listeners() -> None:
+    """Flush queued log records and stop every listener thread."""
+    with _listeners_lock:
+        while _listeners:
+            _listeners.pop().stop()
+
+
+atexit.register(stop_log_listeners)
+
+
+@functools.lru_cache(maxsize=None)
 def setup_logger(
     name: str,
     log_file: Optional[str] = None,
@@ -17,6 +97,14 @@ def setup_logger(
     """
     Setup a logger with console and optional file handlers.
 
+    Cached per ``(name, log_file, level)``: repeat calls (every service
+    constructor asks for its loggers) return the configured logger
+    without touching the config.
+
+    The logger itself only has a ``QueueHandler``; console and file
+    output happen on a background ``QueueListener`` thread, so logging
+    never blocks the caller on stdout or disk.
+
     Args:
         name: Logger name
         log_file: Optional log file path
@@ -37,16 +125,17 @@ def setup_logger(
         return logger
 
     # Create formatters
-    formatter = logging.Formatter(config.logging.format)
+    formatter = _ContextFormatter(config.logging.format)
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers: List[logging.Handler] = [console_handler]
 
     # File handler — skipped in production (Railway has ephemeral filesystem;
-    # stdout is captured automatically by the platform).
+    # stdout is captured automatically by the platform).  Records are
+    # buffered and written in chunks; ERROR and above flush immediately.
     if log_file and not config.is_production:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
@@ -58,27 +147,35 @@ def setup_logger(
         )
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(
+            MemoryHandler(FILE_LOG_BUFFER, flushLevel=logging.ERROR, target=file_handler)
+        )
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _listeners_lock:
+        _listeners.append(listener)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    logger.addHandler(queue_handler)
 
     return logger
 
 
 def get_sync_logger() -> logging.Logger:
     """Get logger for sync operations."""
-    config = get_config()
-    return setup_logger("sync", config.logging.files.sync)
+    return setup_logger("sync", _files().sync)
 
 
 def get_webhook_logger() -> logging.Logger:
     """Get logger for webhook operations."""
-    config = get_config()
-    return setup_logger("webhook", config.logging.files.webhook)
+    return setup_logger("webhook", _files().webhook)
 
 
 def get_error_logger() -> logging.Logger:
     """Get logger for error tracking."""
-    config = get_config()
-    return setup_logger("error", config.logging.files.error, "ERROR")
+    return setup_logger("error", _files().error, "ERROR")
 
 
 def get_api_logger() -> logging.Logger:
@@ -0,0 +1,59 @@
+"""Token-bucket rate limiting shared by threads and coroutines."""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    Callers only wait when the bucket is empty, so bursts up to
+    ``capacity`` go out immediately and the sustained rate is capped at
+    ``rate``.
+    """
+
+    def __init__(self, rate: float = 2.0, capacity: int = 4):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before its token is valid.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Debt is repaid at ``rate``
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a token is available."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
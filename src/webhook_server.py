@@ -1,56 +1,115 @@
 """FastAPI webhook server for receiving Shopify webhooks.
 
-In production (Railway) the background sync scheduler is embedded in this
-process so that a single service handles both webhooks and periodic syncs.
+By default the background sync scheduler is embedded in this process so
+that a single service handles both webhooks and periodic syncs.  Set
+``EMBED_SCHEDULER=false`` when the ``worker`` process (``python -m
+src.scheduler``) runs the nightly sync instead, so a long FileMaker sync
+never competes with webhook handling for CPU, threads or connections.
 """
 
-import json
+import asyncio
+import logging
 import threading
-from collections import OrderedDict
+import time
+import zlib
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 
-from .services.shopify_sync import ShopifySyncService
+from .services.shopify_sync import ShopifySyncService, close_shared_client
+from .services.webhook_batcher import WebhookBatcher
 from .middleware.webhook_validator import WebhookValidator
-from .scheduler import create_background_scheduler
+from .scheduler import (
+    create_background_scheduler, close_sync_service, wait_for_nightly_sync
+)
 from .utils.logger import get_webhook_logger
 from .utils.config import get_config
+from .utils.dedup import RecentKeys
 from .utils.exceptions import WebhookValidationError
 
+try:  # ISA-L's SIMD inflate when installed; same API as the stdlib module
+    from isal import igzip as _gzip
+except ImportError:
+    import gzip as _gzip
+
 # Initialize shared state
 config = get_config()
 logger = get_webhook_logger()
+
+# Environment settings are fixed for the life of the process; bind the
+# ones read per request once instead of re-deriving them on each call.
+IS_PROD = config.is_production
+ENV_NAME = config.env.environment
 webhook_validator = WebhookValidator()
+order_batcher = WebhookBatcher()
 
 # Webhook topics we actually want to process (stock decrements).
 # Only orders/create — NOT orders/paid — to avoid processing the same
 # order twice (Shopify fires both topics for a single purchase).
-ALLOWED_ORDER_TOPICS = {"orders/create"}
+ALLOWED_ORDER_TOPICS = frozenset({"orders/create"})
+
+# Bodies larger than this are parsed on a worker thread so a multi-MB
+# payload doesn't stall every other request on the loop.
+LARGE_BODY_THRESHOLD = 64 * 1024
+
+
+async def _run_for_body(func, body: bytes, *args):
+    """Call ``func(body, *args)``, off the event loop for large bodies."""
+    if len(body) > LARGE_BODY_THRESHOLD:
+        return await asyncio.to_thread(func, body, *args)
+    return func(body, *args)
+
+
+def _load_body(body: bytes, content_encoding: Optional[str]) -> Any:
+    """Parse a webhook body, inflating it first if it was sent gzipped.
+
+    Raises:
+        ValueError: If the body is not valid (gzipped) JSON.
+    """
+    if content_encoding == "gzip":
+        try:
+            body = _gzip.decompress(body)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"invalid gzip body: {e}") from e
+    return orjson.loads(body)
+
+
+async def _read_signed_body(request: Request, signature: Optional[str]) -> bytearray:
+    """Read the request body, HMAC-ing each chunk as it arrives.
+
+    The signature is computed while the body is still being received, so
+    there is no second pass over a large payload once it is complete.
+    Shopify signs the bytes as sent, so a gzipped body is verified before
+    it is inflated (see ``_load_body``).
+
+    Raises:
+        WebhookValidationError: If the signature is missing or invalid.
+    """
+    stream = webhook_validator.begin_signature()
+    body = bytearray()
+    async for chunk in request.stream():
+        stream.update(chunk)
+        body += chunk
+    webhook_validator.finalize_signature(stream, signature)
+    return body
 
 # ── Idempotency guard ─────────────────────────────────────────────
 # Shopify guarantees "at-least-once" delivery, so the same webhook may
-# arrive multiple times.  We track recently processed order IDs in
-# memory to skip duplicates.  An OrderedDict acts as an LRU with a
-# configurable max size so memory stays bounded.
-_MAX_PROCESSED = 1000
-_processed_orders: OrderedDict = OrderedDict()
-_processed_lock = threading.Lock()
+# arrive multiple times.  We remember processed order IDs in memory for
+# a day (longer than Shopify's retry window) to skip duplicates; the
+# size cap keeps memory bounded during bursts.
+_MAX_PROCESSED = 10_000
+_PROCESSED_TTL = 86_400  # seconds
+_processed_orders = RecentKeys(maxsize=_MAX_PROCESSED, ttl=_PROCESSED_TTL)
 
 
 def _mark_processed(order_id: int) -> bool:
     """Mark an order as processed.  Returns True if it was NEW."""
-    with _processed_lock:
-        if order_id in _processed_orders:
-            return False  # duplicate
-        _processed_orders[order_id] = True
-        # Evict oldest entries when we exceed the cap
-        while len(_processed_orders) > _MAX_PROCESSED:
-            _processed_orders.popitem(last=False)
-        return True
+    return _processed_orders.add(order_id)
 
 
 # ------------------------------------------------------------------
@@ -64,25 +123,64 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 60)
     logger.info("FileMaker-Shopify Webhook Server Starting")
     logger.info("=" * 60)
-    logger.info(f"Environment:          {config.env.environment}")
-    logger.info(f"Port:                 {config.env.port}")
-    logger.info(f"Webhook validation:   {config.webhook.validate_signature}")
+    logger.info("Environment:          %s", config.env.environment)
+    logger.info("Port:                 %s", config.env.port)
+    logger.info("Webhook validation:   %s", config.webhook.validate_signature)
     sc = config.scheduler
-    logger.info(
-        f"Nightly sync:         @ {sc.nightly_sync_hour:02d}:{sc.nightly_sync_minute:02d} ({sc.timezone})"
-    )
+    if config.env.embed_scheduler:
+        logger.info(
+            "Nightly sync:         @ %02d:%02d (%s)",
+            sc.nightly_sync_hour, sc.nightly_sync_minute, sc.timezone
+        )
+    else:
+        logger.info("Nightly sync:         separate worker process")
     logger.info("=" * 60)
 
+    # One sync service for the whole process: its Shopify connection pool
+    # (and the shared FileMaker client) stay warm between webhooks.
+    sync_service = ShopifySyncService()
+    app.state.sync_service = sync_service
+    order_batcher.start(sync_service, _processed_orders)
+
+    # Refund workers: each takes one queued refund at a time and runs the
+    # blocking FM/Shopify flow on a thread, so up to ``refund_workers``
+    # refunds progress concurrently without touching the event loop.
+    refund_queue: asyncio.Queue = asyncio.Queue(maxsize=config.webhook.refund_queue_size)
+    app.state.refund_queue = refund_queue
+    refund_workers = [
+        asyncio.create_task(_refund_worker(refund_queue, sync_service))
+        for _ in range(config.webhook.refund_workers)
+    ]
+
     # Start the background nightly scheduler
-    scheduler = create_background_scheduler()
-    scheduler.start()
-    logger.info("Nightly scheduler started")
+    scheduler = None
+    sync_stopping = threading.Event()
+    if config.env.embed_scheduler:
+        scheduler = create_background_scheduler(sync_stopping)
+        scheduler.start()
+        logger.info("Nightly scheduler started")
 
     yield
 
     # ── Shutdown ──────────────────────────────────────────────────────
-    logger.info("Shutting down nightly scheduler...")
-    scheduler.shutdown(wait=True)
+    if scheduler is not None:
+        logger.info("Shutting down nightly scheduler...")
+        sync_stopping.set()
+        scheduler.shutdown()
+        # The scheduler only cancels the job's coroutine; the sync thread
+        # keeps using the API clients until it reaches a stop point.
+        await asyncio.to_thread(wait_for_nightly_sync)
+        close_sync_service()
+    logger.info("Flushing queued orders and refunds...")
+    # Joining the batcher waits on its final flush (FM/Shopify I/O); keep
+    # the loop free for the refund workers still draining their queue.
+    await asyncio.to_thread(order_batcher.stop)
+    await refund_queue.join()
+    for worker in refund_workers:
+        worker.cancel()
+    await asyncio.gather(*refund_workers, return_exceptions=True)
+    sync_service.close()
+    close_shared_client()
     logger.info("Webhook server shut down.")
 
 
@@ -95,84 +193,91 @@ app = FastAPI(
     description="Webhook receiver for Shopify order events",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+
+# ── Pre-serialized response bodies ────────────────────────────────
+# The hot responses have a fixed shape, so they are rendered from byte
+# templates instead of building a dict and running it through the JSON
+# encoder on every request.  Dynamic values go through orjson.dumps so
+# they are quoted and escaped exactly as ORJSONResponse would.
+_ROOT_BODY = orjson.dumps({
+    "service": "FileMaker-Shopify Sync Webhook Server",
+    "version": "1.0.0",
+    "status": "running"
+})
+_ORDER_ACCEPTED_TPL = (
+    b'{"status":"accepted","order_id":%s,"order_name":%s,'
+    b'"message":"Webhook received and queued for processing"}'
 )
+_REFUND_ACCEPTED_TPL = (
+    b'{"status":"accepted","refund_id":%s,"order_id":%s,'
+    b'"message":"Refund webhook received and queued for processing"}'
+)
+
+
+def _json_bytes(body: bytes) -> Response:
+    """Wrap an already-serialized JSON body in a 200 response."""
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/")
 async def root():
     """Root endpoint."""
-    return {
-        "service": "FileMaker-Shopify Sync Webhook Server",
-        "version": "1.0.0",
-        "status": "running"
-    }
+    return _json_bytes(_ROOT_BODY)
+
+
+# (unix second, rendered /health body) — probes within a second share it
+_health_body = (0, b"")
+
+
+def _health_response_body() -> bytes:
+    """/health body at one-second resolution, rendered once per second."""
+    global _health_body
+    second = int(time.time())
+    if _health_body[0] != second:
+        _health_body = (second, orjson.dumps({
+            "status": "healthy",
+            "timestamp": datetime.utcfromtimestamp(second).isoformat(),
+            "environment": ENV_NAME
+        }))
+    return _health_body[1]
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Railway and monitoring."""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "environment": config.env.environment
-    }
+    return _json_bytes(_health_response_body())
 
 
 # ------------------------------------------------------------------
 # Shopify order webhook
 # ------------------------------------------------------------------
 
-async def process_order_in_background(webhook_data: Dict[str, Any]):
-    """Process order webhook in background."""
-    try:
-        with ShopifySyncService() as sync_service:
-            result = sync_service.process_order_webhook(webhook_data)
-
-            if result["success"]:
-                logger.info(
-                    f"Background processing completed for order {result['order_name']}: "
-                    f"{result['items_processed']} items updated"
-                )
-            else:
-                logger.warning(
-                    f"Background processing completed with errors for order {result['order_name']}"
-                )
-
-    except Exception as e:
-        logger.error(f"Background processing failed: {str(e)}", exc_info=True)
-
-
 @app.post("/webhooks/shopify/orders")
-async def shopify_order_webhook(request: Request, background_tasks: BackgroundTasks):
+async def shopify_order_webhook(request: Request):
     """
-    Receive and process Shopify order webhooks.
-
-    Only ``orders/create`` and ``orders/paid`` topics are processed.
-    Other topics are acknowledged (HTTP 200) but ignored so that
-    cancellations or updates do not incorrectly decrement stock.
+    Receive Shopify order webhooks and queue them for batched processing.
+
+    Only ``ALLOWED_ORDER_TOPICS`` are processed.  Other topics are
+    acknowledged (HTTP 200) but ignored so that cancellations or updates
+    do not incorrectly decrement stock; since nothing is done with them,
+    their body is never read or verified.
+    When the batch queue is full the webhook is refused with 503 so
+    Shopify retries it later.
     """
-    # Get raw body for signature validation
-    body = await request.body()
-
     # Get headers
     signature = request.headers.get("X-Shopify-Hmac-SHA256")
     shop_domain = request.headers.get("X-Shopify-Shop-Domain")
     topic = request.headers.get("X-Shopify-Topic")
 
-    logger.info(f"Received webhook: {topic} from {shop_domain}")
-
-    # ── Validate webhook signature ────────────────────────────────────
-    try:
-        webhook_validator.validate_signature(body, signature)
-        webhook_validator.validate_shopify_domain(shop_domain)
-    except WebhookValidationError as e:
-        logger.error(f"Webhook validation failed: {e.message}")
-        raise HTTPException(status_code=401, detail=e.message)
+    logger.info("Received webhook: %s from %s", topic, shop_domain)
 
     # ── Filter by topic ───────────────────────────────────────────────
     if topic not in ALLOWED_ORDER_TOPICS:
-        logger.info(f"Ignoring webhook topic: {topic}")
-        return JSONResponse(
+        logger.info("Ignoring webhook topic: %s", topic)
+        return ORJSONResponse(
             status_code=200,
             content={
                 "status": "ignored",
@@ -181,21 +286,33 @@ async def shopify_order_webhook(request: Request, background_tasks: BackgroundTa
             }
         )
 
+    # ── Read body and validate webhook signature ──────────────────────
+    try:
+        body = await _read_signed_body(request, signature)
+        webhook_validator.validate_shopify_domain(shop_domain)
+    except WebhookValidationError as e:
+        logger.error("Webhook validation failed: %s", e.message)
+        raise HTTPException(status_code=401, detail=e.message)
+
     # ── Parse webhook data ────────────────────────────────────────────
     try:
-        webhook_data = json.loads(body)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in webhook: {str(e)}")
+        webhook_data = await _run_for_body(
+            _load_body, body, request.headers.get("Content-Encoding")
+        )
+    except ValueError as e:
+        logger.error("Invalid JSON in webhook: %s", e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
     order_id = webhook_data.get("id")
     order_name = webhook_data.get("name")
-    logger.info(f"Processing order: {order_name} (ID: {order_id})")
+    logger.info("Processing order: %s (ID: %s)", order_name, order_id)
 
     # ── Idempotency check ─────────────────────────────────────────────
     if not _mark_processed(order_id):
-        logger.info(f"DUPLICATE — order {order_name} (ID: {order_id}) already processed, skipping")
-        return JSONResponse(
+        logger.info(
+            "DUPLICATE — order %s (ID: %s) already processed, skipping", order_name, order_id
+        )
+        return ORJSONResponse(
             status_code=200,
             content={
                 "status": "duplicate",
@@ -205,17 +322,15 @@ async def shopify_order_webhook(request: Request, background_tasks: BackgroundTa
             }
         )
 
-    # Process webhook in background
-    background_tasks.add_task(process_order_in_background, webhook_data)
+    # ── Queue for the next batch ──────────────────────────────────────
+    if not order_batcher.put(webhook_data):
+        # Not processed after all — let Shopify's retry through
+        _processed_orders.discard(order_id)
+        logger.warning("Order queue full — refusing order %s (ID: %s)", order_name, order_id)
+        raise HTTPException(status_code=503, detail="Server busy, retry later")
 
-    return JSONResponse(
-        status_code=200,
-        content={
-            "status": "accepted",
-            "order_id": order_id,
-            "order_name": order_name,
-            "message": "Webhook received and queued for processing"
-        }
+    return _json_bytes(
+        _ORDER_ACCEPTED_TPL % (orjson.dumps(order_id), orjson.dumps(order_name))
     )
 
 
@@ -224,80 +339,84 @@ async def shopify_order_webhook(request: Request, background_tasks: BackgroundTa
 # ------------------------------------------------------------------
 
 # Separate idempotency set for refunds (refund IDs ≠ order IDs)
-_processed_refunds: OrderedDict = OrderedDict()
-_refund_lock = threading.Lock()
+_processed_refunds = RecentKeys(maxsize=_MAX_PROCESSED, ttl=_PROCESSED_TTL)
 
 
 def _mark_refund_processed(refund_id: int) -> bool:
     """Mark a refund as processed.  Returns True if it was NEW."""
-    with _refund_lock:
-        if refund_id in _processed_refunds:
-            return False
-        _processed_refunds[refund_id] = True
-        while len(_processed_refunds) > _MAX_PROCESSED:
-            _processed_refunds.popitem(last=False)
-        return True
+    return _processed_refunds.add(refund_id)
 
 
-async def process_refund_in_background(webhook_data: Dict[str, Any]):
-    """Process refund webhook in background."""
+async def _refund_worker(refund_queue: asyncio.Queue, sync_service: ShopifySyncService):
+    """Process queued refunds one at a time until cancelled."""
+    while True:
+        webhook_data = await refund_queue.get()
+        try:
+            await asyncio.to_thread(process_refund_in_background, webhook_data, sync_service)
+        finally:
+            refund_queue.task_done()
+
+
+def process_refund_in_background(webhook_data: Dict[str, Any], sync_service: ShopifySyncService):
+    """Process a queued refund webhook (blocking; runs on a worker thread)."""
     try:
-        with ShopifySyncService() as sync_service:
-            result = sync_service.process_refund_webhook(webhook_data)
-
-            if result["success"]:
-                logger.info(
-                    f"Background refund processing completed: refund {result['refund_id']} — "
-                    f"{result['items_processed']} items restocked"
-                )
-            else:
-                logger.warning(
-                    f"Background refund processing completed with errors: refund {result['refund_id']}"
-                )
+        result = sync_service.process_refund_webhook(webhook_data)
+
+        if result["success"]:
+            logger.info(
+                "Background refund processing completed: refund %s — %s items restocked",
+                result["refund_id"], result["items_processed"]
+            )
+        else:
+            logger.warning(
+                "Background refund processing completed with errors: refund %s",
+                result["refund_id"]
+            )
 
     except Exception as e:
-        logger.error(f"Background refund processing failed: {str(e)}", exc_info=True)
+        logger.error("Background refund processing failed: %s", e, exc_info=True)
 
 
 @app.post("/webhooks/shopify/refunds")
-async def shopify_refund_webhook(request: Request, background_tasks: BackgroundTasks):
+async def shopify_refund_webhook(request: Request):
     """
-    Receive and process Shopify refund webhooks.
+    Receive Shopify refund webhooks and queue them for the refund workers.
 
     Restocks items in FileMaker when a refund is created with
-    restock_type 'return' or 'cancel'.
+    restock_type 'return' or 'cancel'.  When the refund queue is full the
+    webhook is refused with 503 so Shopify retries it later.
     """
-    body = await request.body()
-
     signature = request.headers.get("X-Shopify-Hmac-SHA256")
     shop_domain = request.headers.get("X-Shopify-Shop-Domain")
     topic = request.headers.get("X-Shopify-Topic")
 
-    logger.info(f"Received webhook: {topic} from {shop_domain}")
+    logger.info("Received webhook: %s from %s", topic, shop_domain)
 
-    # ── Validate webhook signature ────────────────────────────────────
+    # ── Read body and validate webhook signature ──────────────────────
     try:
-        webhook_validator.validate_signature(body, signature)
+        body = await _read_signed_body(request, signature)
         webhook_validator.validate_shopify_domain(shop_domain)
     except WebhookValidationError as e:
-        logger.error(f"Webhook validation failed: {e.message}")
+        logger.error("Webhook validation failed: %s", e.message)
         raise HTTPException(status_code=401, detail=e.message)
 
     # ── Parse webhook data ────────────────────────────────────────────
     try:
-        webhook_data = json.loads(body)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in refund webhook: {str(e)}")
+        webhook_data = await _run_for_body(
+            _load_body, body, request.headers.get("Content-Encoding")
+        )
+    except ValueError as e:
+        logger.error("Invalid JSON in refund webhook: %s", e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
     refund_id = webhook_data.get("id")
     order_id = webhook_data.get("order_id")
-    logger.info(f"Processing refund: {refund_id} (order: {order_id})")
+    logger.info("Processing refund: %s (order: %s)", refund_id, order_id)
 
     # ── Idempotency check ─────────────────────────────────────────────
     if not _mark_refund_processed(refund_id):
-        logger.info(f"DUPLICATE — refund {refund_id} already processed, skipping")
-        return JSONResponse(
+        logger.info("DUPLICATE — refund %s already processed, skipping", refund_id)
+        return ORJSONResponse(
             status_code=200,
             content={
                 "status": "duplicate",
@@ -306,17 +425,17 @@ async def shopify_refund_webhook(request: Request, background_tasks: BackgroundT
             }
         )
 
-    # Process refund in background
-    background_tasks.add_task(process_refund_in_background, webhook_data)
-
-    return JSONResponse(
-        status_code=200,
-        content={
-            "status": "accepted",
-            "refund_id": refund_id,
-            "order_id": order_id,
-            "message": "Refund webhook received and queued for processing"
-        }
+    # ── Queue for a refund worker ─────────────────────────────────────
+    try:
+        request.app.state.refund_queue.put_nowait(webhook_data)
+    except asyncio.QueueFull:
+        # Not processed after all — let Shopify's retry through
+        _processed_refunds.discard(refund_id)
+        logger.warning("Refund queue full — refusing refund %s", refund_id)
+        raise HTTPException(status_code=503, detail="Server busy, retry later")
+
+    return _json_bytes(
+        _REFUND_ACCEPTED_TPL % (orjson.dumps(refund_id), orjson.dumps(order_id))
     )
 
 
@@ -327,13 +446,21 @@ async def shopify_refund_webhook(request: Request, background_tasks: BackgroundT
 @app.post("/webhooks/shopify/test")
 async def test_webhook(request: Request):
     """Test endpoint — only available in development."""
-    if config.is_production:
+    if IS_PROD:
         raise HTTPException(status_code=404, detail="Not found")
 
     body = await request.body()
-    webhook_data = json.loads(body)
+    try:
+        webhook_data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    logger.info(f"Test webhook received: {json.dumps(webhook_data, indent=2)}")
+    # Indenting the whole payload is only worth it when the line is emitted
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Test webhook received: %s",
+            orjson.dumps(webhook_data, option=orjson.OPT_INDENT_2).decode()
+        )
 
     return {
         "status": "test_success",
@@ -349,8 +476,8 @@ async def test_webhook(request: Request):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler."""
-    logger.warning(f"HTTP {exc.status_code}: {exc.detail}")
-    return JSONResponse(
+    logger.warning("HTTP %s: %s", exc.status_code, exc.detail)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
@@ -362,12 +489,12 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """General exception handler for unexpected errors."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
-            "message": str(exc) if not config.is_production else "An error occurred"
+            "message": str(exc) if not IS_PROD else "An error occurred"
         }
     )
 
@@ -376,8 +503,11 @@ if __name__ == "__main__":
     import uvicorn
 
     uvicorn.run(
-        "webhook_server:app",
+        "src.webhook_server:app",
         host="0.0.0.0",
         port=config.env.port,
-        reload=not config.is_production
+        loop="uvloop",
+        http="httptools",
+        workers=config.env.workers,
+        reload=not IS_PROD
     )
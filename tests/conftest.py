@@ -1,8 +1,10 @@
 """Pytest configuration and fixtures."""
 
 import pytest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock
 
+from src.api.filemaker_client import FileMakerClient
+from src.api.shopify_client import ShopifyClient
 from src.models.product import StockItem
 from src.models.sync_result import SyncResult
 
@@ -42,7 +44,7 @@ def sample_sync_result():
 @pytest.fixture
 def mock_filemaker_client():
     """Create a mock FileMaker client."""
-    client = MagicMock()
+    client = Mock(spec=FileMakerClient)
     client.authenticate.return_value = "mock-token"
     client.get_all_stock.return_value = []
     client.get_stock_by_sku.return_value = None
@@ -54,7 +56,7 @@ def mock_filemaker_client():
 @pytest.fixture
 def mock_shopify_client():
     """Create a mock Shopify client."""
-    client = MagicMock()
+    client = Mock(spec=ShopifyClient)
     client.get_inventory_by_sku.return_value = None
     client.update_inventory.return_value = True
     client.bulk_update_inventory.return_value = {
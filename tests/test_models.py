@@ -3,8 +3,8 @@
 import pytest
 from datetime import datetime
 
-from src.models.product import StockItem
-from src.models.sync_result import SyncResult, SyncError
+from src.models.product import StockItem, StockUpdate
+from src.models.sync_result import LineItemError, SyncResult, SyncError
 
 
 class TestStockItem:
@@ -70,6 +70,63 @@ class TestStockItem:
         assert item.source == "filemaker"
         assert item.metadata["test"] == "value"
 
+    def test_stock_item_unchecked_skips_validation(self):
+        """Test that the internal fast-path constructor skips validation."""
+        item = StockItem._unchecked(
+            sku="TEST-001",
+            quantity=-3,
+            source="shopify",
+            metadata={"variant_id": 1}
+        )
+
+        assert item.quantity == -3
+        assert item.last_updated is None
+        assert item.to_dict()["last_updated"] is None
+
+
+class TestStockUpdate:
+    """Tests for StockUpdate model."""
+
+    def test_create_stock_update(self):
+        """Test creating a stock update with positional fields."""
+        update = StockUpdate("TEST-001", 7, 3, "Test product")
+
+        assert update.sku == "TEST-001"
+        assert update.quantity == 7
+        assert update.old_quantity == 3
+        assert update.name == "Test product"
+        assert update.inventory_item_id is None
+
+    def test_stock_update_has_no_instance_dict(self):
+        """Test that updates are slotted records."""
+        update = StockUpdate("TEST-001", 7, 3, "Test product", 123)
+
+        assert not hasattr(update, "__dict__")
+        with pytest.raises(AttributeError):
+            update.label = "x"
+
+
+class TestLineItemError:
+    """Tests for LineItemError model."""
+
+    def test_line_item_error_to_dict(self):
+        """Test serializing a per-SKU webhook error."""
+        error = LineItemError("TEST-001", "Product not found", "Test product")
+
+        assert error.to_dict() == {
+            "sku": "TEST-001",
+            "title": "Test product",
+            "error": "Product not found",
+            "type": None,
+        }
+
+    def test_line_item_error_has_no_instance_dict(self):
+        """Test that errors are slotted records."""
+        error = LineItemError(None, "boom", error_type="RuntimeError")
+
+        assert not hasattr(error, "__dict__")
+        assert error.to_dict()["type"] == "RuntimeError"
+
 
 class TestSyncResult:
     """Tests for SyncResult model."""
@@ -132,3 +189,16 @@ class TestSyncResult:
         assert "Updated: 8" in summary
         assert "Failed: 1" in summary
         assert "Skipped: 1" in summary
+
+    def test_to_summary_dict_truncates_errors(self):
+        """Test that to_summary_dict caps the serialized error list."""
+        result = SyncResult(success=False, total_items=20)
+        for i in range(15):
+            result.add_error(f"TEST-{i:03d}", "TestError", "Test error message")
+
+        data = result.to_summary_dict(error_limit=10)
+
+        assert len(data["errors"]) == 10
+        assert data["errors_truncated"] is True
+        assert data["failed_count"] == 15
+        assert len(result.to_dict()["errors"]) == 15
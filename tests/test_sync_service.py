@@ -0,0 +1,137 @@
+"""Tests for the on-demand SyncService entry points."""
+
+import logging
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from src.models.product import StockItem
+from src.models.sync_result import SyncResult
+from src.services.sync_service import SyncService
+from src.utils.exceptions import FileMakerAPIError
+
+
+class TestSyncService:
+    """Tests for execute_filemaker_to_shopify_sync and execute_single_sku_sync."""
+
+    @pytest.fixture
+    def service(self, monkeypatch, mock_filemaker_client, mock_shopify_client):
+        """Create a SyncService wired to the client doubles."""
+        logger = logging.getLogger("test_sync_service")
+        monkeypatch.setattr("src.services.sync_service.get_config", lambda: None)
+        monkeypatch.setattr("src.services.sync_service.get_sync_logger", lambda: logger)
+        monkeypatch.setattr("src.services.sync_service.get_error_logger", lambda: logger)
+
+        service = SyncService()
+        service._filemaker_sync = SimpleNamespace(
+            filemaker_client=mock_filemaker_client,
+            shopify_client=mock_shopify_client,
+        )
+        return service
+
+    def test_sync_without_dry_run_runs_nightly_sync(self, service, monkeypatch):
+        """Test a real run delegates to the nightly sync."""
+        expected = SyncResult(success=True)
+        nightly = Mock(return_value=expected)
+        monkeypatch.setattr(service, "execute_nightly_sync", nightly)
+
+        assert service.execute_filemaker_to_shopify_sync(full_resync=True) is expected
+        nightly.assert_called_once_with(full_resync=True)
+
+    def test_sync_dry_run_reports_changes_without_writing(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test a dry run compares FM with Shopify and writes nothing."""
+        mock_filemaker_client.iter_all_stock.return_value = [
+            StockItem(sku="A", quantity=5, source="filemaker"),
+            StockItem(sku="B", quantity=3, source="filemaker"),
+            StockItem(sku="C", quantity=1, source="filemaker"),
+        ]
+        mock_shopify_client.get_inventory_by_skus.return_value = {
+            "A": StockItem(sku="A", quantity=2, source="shopify"),
+            "B": StockItem(sku="B", quantity=3, source="shopify"),
+        }
+
+        result = service.execute_filemaker_to_shopify_sync(dry_run=True)
+
+        assert result.total_items == 3
+        assert result.updated_count == 1
+        assert result.skipped_count == 1
+        assert [error.sku for error in result.errors] == ["C"]
+        assert result.success is False
+        mock_filemaker_client.recalculate_stock.assert_not_called()
+        mock_shopify_client.update_inventory.assert_not_called()
+        mock_shopify_client.update_inventory_bulk.assert_not_called()
+
+    def test_single_sku_sync_updates_changed_stock(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test a changed SKU is recalculated in FM and pushed to Shopify."""
+        mock_filemaker_client.get_stock.return_value = 7
+        mock_shopify_client.get_inventory_by_sku.return_value = StockItem(
+            sku="A", quantity=4, source="shopify"
+        )
+
+        result = service.execute_single_sku_sync("A")
+
+        assert result.success is True
+        assert result.updated_count == 1
+        mock_filemaker_client.recalculate_stock.assert_called_once_with("A")
+        mock_shopify_client.update_inventory.assert_called_once_with("A", 7)
+
+    def test_single_sku_sync_skips_unchanged_stock(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test a SKU already in step with Shopify is not written."""
+        mock_filemaker_client.get_stock.return_value = 4
+        mock_shopify_client.get_inventory_by_sku.return_value = StockItem(
+            sku="A", quantity=4, source="shopify"
+        )
+
+        result = service.execute_single_sku_sync("A")
+
+        assert result.skipped_count == 1
+        assert result.updated_count == 0
+        mock_shopify_client.update_inventory.assert_not_called()
+
+    def test_single_sku_sync_dry_run_writes_nothing(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test a dry run neither recalculates in FM nor writes to Shopify."""
+        mock_filemaker_client.get_stock.return_value = 7
+        mock_shopify_client.get_inventory_by_sku.return_value = StockItem(
+            sku="A", quantity=4, source="shopify"
+        )
+
+        result = service.execute_single_sku_sync("A", dry_run=True)
+
+        assert result.updated_count == 1
+        mock_filemaker_client.recalculate_stock.assert_not_called()
+        mock_shopify_client.update_inventory.assert_not_called()
+
+    def test_single_sku_sync_missing_in_shopify(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test a SKU unknown to Shopify is reported as an error."""
+        mock_filemaker_client.get_stock.return_value = 7
+        mock_shopify_client.get_inventory_by_sku.return_value = None
+
+        result = service.execute_single_sku_sync("A")
+
+        assert result.success is False
+        assert result.errors[0].error_type == "SKUNotFoundError"
+        mock_shopify_client.update_inventory.assert_not_called()
+
+    def test_single_sku_sync_records_api_errors(
+        self, service, mock_filemaker_client, mock_shopify_client
+    ):
+        """Test an FM failure is recorded against the SKU instead of raised."""
+        mock_filemaker_client.recalculate_stock.side_effect = FileMakerAPIError("recalc failed")
+
+        result = service.execute_single_sku_sync("A")
+
+        assert result.success is False
+        assert result.errors[0].sku == "A"
+        assert result.errors[0].error_type == "FileMakerAPIError"
+        mock_shopify_client.get_inventory_by_sku.assert_not_called()
@@ -2,7 +2,6 @@
 
 import pytest
 import hmac
-import hashlib
 import base64
 
 from src.middleware.webhook_validator import WebhookValidator
@@ -35,11 +34,7 @@ class TestWebhookValidator:
     def create_signature(self, body: bytes, secret: str) -> str:
         """Create a valid HMAC signature."""
         return base64.b64encode(
-            hmac.new(
-                secret.encode('utf-8'),
-                body,
-                hashlib.sha256
-            ).digest()
+            hmac.digest(secret.encode('utf-8'), body, "sha256")
         ).decode('utf-8')
 
     def test_validate_signature_success(self, validator):
@@ -59,6 +54,14 @@ class TestWebhookValidator:
         with pytest.raises(WebhookValidationError, match="Invalid webhook signature"):
             validator.validate_signature(body, invalid_signature)
 
+    def test_validate_signature_wrong_secret(self, validator):
+        """Test a well-formed signature made with another secret is rejected."""
+        body = b'{"test": "data"}'
+        signature = self.create_signature(body, "other_secret")
+
+        with pytest.raises(WebhookValidationError, match="Invalid webhook signature"):
+            validator.validate_signature(body, signature)
+
     def test_validate_signature_missing(self, validator):
         """Test missing signature raises error."""
         body = b'{"test": "data"}'
@@ -66,6 +69,28 @@ class TestWebhookValidator:
         with pytest.raises(WebhookValidationError, match="Missing webhook signature"):
             validator.validate_signature(body, None)
 
+    def test_finalize_signature_chunked_body(self, validator):
+        """Test a body fed in chunks validates like the whole body."""
+        body = b'{"test": "data", "items": [1, 2, 3]}'
+        signature = self.create_signature(body, "test_secret")
+
+        stream = validator.begin_signature()
+        for i in range(0, len(body), 5):
+            stream.update(body[i:i + 5])
+
+        assert validator.finalize_signature(stream, signature) is True
+
+    def test_finalize_signature_invalid(self, validator):
+        """Test a chunked body that doesn't match the signature raises error."""
+        signature = self.create_signature(b'{"test": "data"}', "test_secret")
+
+        stream = validator.begin_signature()
+        stream.update(b'{"test": ')
+        stream.update(b'"tampered"}')
+
+        with pytest.raises(WebhookValidationError, match="Invalid webhook signature"):
+            validator.finalize_signature(stream, signature)
+
     def test_validate_shopify_domain_success(self, validator):
         """Test valid Shopify domain."""
         result = validator.validate_shopify_domain("test-shop.myshopify.com")
@@ -77,6 +102,11 @@ class TestWebhookValidator:
         with pytest.raises(WebhookValidationError, match="Invalid shop domain"):
             validator.validate_shopify_domain("malicious-site.com")
 
+    def test_validate_shopify_domain_rejects_nested_path(self, validator):
+        """Test a value that merely ends with .myshopify.com is rejected."""
+        with pytest.raises(WebhookValidationError, match="Invalid shop domain"):
+            validator.validate_shopify_domain("evil.example/x.myshopify.com")
+
     def test_validate_shopify_domain_missing(self, validator):
         """Test missing domain raises error."""
         with pytest.raises(WebhookValidationError, match="Missing shop domain"):